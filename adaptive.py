@@ -0,0 +1,259 @@
+import random
+import struct
+from array import array
+from bisect import bisect_right
+
+import problem_bank
+from game_state import OUTCOME_CORRECT
+
+# 문제 은행 전체(연산자별 문제를 이어 붙인 것)에서의 문제 번호 = 연산자 오프셋 + 은행 인덱스
+FACT_OFFSETS = tuple(
+    sum(len(problem_bank.BANK[op]) for op in problem_bank.OPERATORS[:code])
+    for code in range(len(problem_bank.OPERATORS))
+)
+FACT_COUNT = sum(len(problem_bank.BANK[op]) for op in problem_bank.OPERATORS)
+
+# 유형: 연산자 × 받아올림/받아내림 여부 (0: 받아올림 없는 덧셈, 1: 받아올림 있는 덧셈, ...)
+CLASS_COUNT = 2 * len(problem_bank.OPERATORS)
+CLASS_NAMES = ("덧셈", "덧셈 (받아올림)", "뺄셈", "뺄셈 (받아내림)")
+
+# 누적 횟수 상한 (넘으면 절반으로 줄여 최근 기록 비중 유지)
+ATTEMPT_CAP = 255
+# 응답 시간 이동 평균의 새 값 비중
+EWMA_ALPHA = 0.3
+
+
+def fact_class(operator, left, right):
+    """문제 유형 번호"""
+    if operator == '+':
+        regroup = left % 10 + right % 10 >= 10
+    else:
+        regroup = left % 10 < right % 10
+    return 2 * problem_bank.OPERATORS.index(operator) + regroup
+
+
+def _build_classes():
+    """문제 번호 → (유형, 유형 안에서의 위치), 유형별 문제 번호 목록"""
+    classes = array('B')
+    slots = array('H')
+    members = [array('H') for _ in range(CLASS_COUNT)]
+    for operator in problem_bank.OPERATORS:
+        problems = problem_bank.BANK[operator]
+        offset = FACT_OFFSETS[problem_bank.OPERATORS.index(operator)]
+        for index in range(len(problems)):
+            cls = fact_class(operator, problems.left[index], problems.right[index])
+            classes.append(cls)
+            slots.append(len(members[cls]))
+            members[cls].append(offset + index)
+    return classes, slots, tuple(members)
+
+
+# import 시 한 번만 만드는 공용 표 (모든 플레이어가 공유)
+FACT_CLASS, FACT_SLOT, CLASS_FACTS = _build_classes()
+
+
+class FenwickTree:
+    """가중치 합 트리: 가중치 변경과 가중치 비례 추출이 모두 O(log n)"""
+
+    __slots__ = ('tree',)
+
+    def __init__(self, weights, typecode='d'):
+        # 1부터 시작하는 인덱스, O(n) 구성
+        tree = array(typecode, [0.0])
+        tree.extend(weights)
+        n = len(tree) - 1
+        for i in range(1, n + 1):
+            parent = i + (i & -i)
+            if parent <= n:
+                tree[parent] += tree[i]
+        self.tree = tree
+
+    def __len__(self):
+        return len(self.tree) - 1
+
+    def add(self, index, delta):
+        """index(0부터)의 가중치에 delta 더함"""
+        tree = self.tree
+        i = index + 1
+        while i < len(tree):
+            tree[i] += delta
+            i += i & -i
+
+    def total(self):
+        """전체 가중치 합"""
+        tree = self.tree
+        i = len(tree) - 1
+        total = 0.0
+        while i > 0:
+            total += tree[i]
+            i -= i & -i
+        return total
+
+    def find(self, value):
+        """누적 가중치가 value를 처음 넘는 인덱스(0부터)"""
+        tree = self.tree
+        n = len(tree) - 1
+        pos = 0
+        step = 1 << n.bit_length()
+        while step:
+            nxt = pos + step
+            if nxt <= n and tree[nxt] <= value:
+                pos = nxt
+                value -= tree[nxt]
+            step >>= 1
+        return min(pos, n - 1)
+
+
+class PlayerStats:
+    """플레이어 한 명의 문제별/유형별 정답률과 응답 시간 (고정 크기 배열)
+
+    문제 가중치는 유형별 FenwickTree(float32)에 두고, 유형을 먼저 고른 뒤 유형 안에서 문제를 고르므로
+    추출과 갱신이 모두 O(log n)입니다. 트리는 처음 추출할 때 통계로부터 O(n)에 한 번 만들어 보관하므로
+    기록만 하는 객체(다른 모드의 게임, 저장소에서 역직렬화한 객체)는 통계 배열만 차지합니다.
+    처음 보는 문제의 가중치는 1, 자주 틀리거나 느린 문제일수록 커지고 빠르게 맞힌 문제는 작아집니다.
+    """
+
+    __slots__ = (
+        'time_limit_ms', 'attempts', 'misses', 'avg_ms',
+        'class_attempts', 'class_misses', 'class_avg_ms', 'trees',
+        # 상태 저장소가 객체별로 읽은 version을 기억할 수 있도록 (weakref)
+        '__weakref__',
+    )
+
+    def __init__(self, time_limit_ms=5000):
+        self.time_limit_ms = time_limit_ms
+        self.attempts = array('B', [0]) * FACT_COUNT
+        self.misses = array('B', [0]) * FACT_COUNT
+        self.avg_ms = array('H', [0]) * FACT_COUNT
+        self.class_attempts = array('I', [0]) * CLASS_COUNT
+        self.class_misses = array('I', [0]) * CLASS_COUNT
+        self.class_avg_ms = array('f', [0.0]) * CLASS_COUNT
+        # 유형별 가중치 트리 (처음 추출할 때 생성)
+        self.trees = None
+
+    def to_bytes(self):
+        """다른 프로세스로 옮길 수 있는 바이트열 (가중치 트리는 저장하지 않음)"""
+        arrays = (self.attempts, self.misses, self.avg_ms,
+                  self.class_attempts, self.class_misses, self.class_avg_ms)
+        return struct.pack('<I', self.time_limit_ms) + b''.join(a.tobytes() for a in arrays)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """to_bytes()의 역"""
+        stats = cls(struct.unpack_from('<I', data)[0])
+        pos = 4
+        for values in (stats.attempts, stats.misses, stats.avg_ms,
+                       stats.class_attempts, stats.class_misses, stats.class_avg_ms):
+            size = values.itemsize * len(values)
+            values[:] = array(values.typecode, data[pos:pos + size])
+            pos += size
+        return stats
+
+    def fact_weight(self, fact):
+        """문제 하나의 추출 가중치"""
+        attempts = self.attempts[fact]
+        if not attempts:
+            return 1.0
+        miss_rate = self.misses[fact] / attempts
+        slowness = min(1.0, self.avg_ms[fact] / self.time_limit_ms)
+        return 0.25 + 3.0 * miss_rate + slowness
+
+    def class_weight(self, cls):
+        """유형 가중치 배율 (틀린 비율이 높고 느린 유형일수록 큼)"""
+        attempts = self.class_attempts[cls]
+        if not attempts:
+            return 1.0
+        miss_rate = self.class_misses[cls] / attempts
+        slowness = min(1.0, self.class_avg_ms[cls] / self.time_limit_ms)
+        return 0.5 + 2.0 * miss_rate + slowness
+
+    def record(self, operator, index, correct, response_ms):
+        """문제 하나의 결과 반영"""
+        fact = FACT_OFFSETS[problem_bank.OPERATORS.index(operator)] + index
+        cls = FACT_CLASS[fact]
+        old_weight = self.fact_weight(fact)
+
+        if self.attempts[fact] >= ATTEMPT_CAP:
+            self.attempts[fact] //= 2
+            self.misses[fact] //= 2
+        response_ms = min(response_ms, self.time_limit_ms)
+        if self.attempts[fact]:
+            self.avg_ms[fact] = round(self.avg_ms[fact] + EWMA_ALPHA * (response_ms - self.avg_ms[fact]))
+        else:
+            self.avg_ms[fact] = round(response_ms)
+        self.attempts[fact] += 1
+        self.misses[fact] += not correct
+
+        if self.class_attempts[cls]:
+            self.class_avg_ms[cls] += EWMA_ALPHA * (response_ms - self.class_avg_ms[cls])
+        else:
+            self.class_avg_ms[cls] = response_ms
+        self.class_attempts[cls] += 1
+        self.class_misses[cls] += not correct
+
+        if self.trees is not None:
+            self.trees[cls].add(FACT_SLOT[fact], self.fact_weight(fact) - old_weight)
+
+    def record_game(self, game):
+        """끝난 게임의 모든 문제 결과 반영 (느림 기준은 이 게임의 제한 시간으로 바뀜)"""
+        time_limit_ms = game.time_limit_ns // 1_000_000
+        if time_limit_ms != self.time_limit_ms:
+            # 제한 시간이 바뀌면 모든 문제의 가중치가 바뀌므로 다음 추출 때 트리를 다시 만듦
+            self.time_limit_ms = time_limit_ms
+            self.trees = None
+        for i in range(len(game)):
+            operator = problem_bank.OPERATORS[game.operators[i]]
+            self.record(operator, game.indices[i], game.outcomes[i] == OUTCOME_CORRECT, game.response_ms(i))
+
+    def build_trees(self):
+        """유형별 문제 가중치 트리 (통계로부터 O(n))"""
+        fact_weight = self.fact_weight
+        return tuple(FenwickTree([fact_weight(fact) for fact in members], 'f') for members in CLASS_FACTS)
+
+    def draw(self, count, rng=random):
+        """가중치에 비례해 서로 다른 문제 count개를 (연산자, 인덱스) 목록으로 추출"""
+        if self.trees is None:
+            self.trees = self.build_trees()
+        trees = self.trees
+        drawn = []
+        removed = []
+        for _ in range(count):
+            masses = [tree.total() * self.class_weight(cls) for cls, tree in enumerate(trees)]
+            value = rng.random() * sum(masses)
+            cls = 0
+            while cls < CLASS_COUNT - 1 and value >= masses[cls]:
+                value -= masses[cls]
+                cls += 1
+            tree = trees[cls]
+            slot = tree.find(rng.random() * tree.total())
+            fact = CLASS_FACTS[cls][slot]
+            # 한 게임 안에서 같은 문제가 다시 나오지 않도록 잠시 가중치 제거
+            weight = self.fact_weight(fact)
+            tree.add(slot, -weight)
+            removed.append((tree, slot, weight))
+
+            code = bisect_right(FACT_OFFSETS, fact) - 1
+            drawn.append((problem_bank.OPERATORS[code], fact - FACT_OFFSETS[code]))
+        for tree, slot, weight in removed:
+            tree.add(slot, weight)
+        return drawn
+
+    def class_summary(self):
+        """유형별 (이름, 시도 수, 정답률, 평균 응답 ms)"""
+        return [
+            (
+                CLASS_NAMES[cls],
+                self.class_attempts[cls],
+                1 - self.class_misses[cls] / self.class_attempts[cls] if self.class_attempts[cls] else None,
+                self.class_avg_ms[cls] if self.class_attempts[cls] else None,
+            )
+            for cls in range(CLASS_COUNT)
+        ]
+
+    def nbytes(self):
+        """이 객체가 차지하는 대략적인 메모리 (바이트, 트리를 만들었으면 트리 포함)"""
+        arrays = (self.attempts, self.misses, self.avg_ms,
+                  self.class_attempts, self.class_misses, self.class_avg_ms)
+        if self.trees is not None:
+            arrays += tuple(tree.tree for tree in self.trees)
+        return sum(a.itemsize * len(a) for a in arrays)
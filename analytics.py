@@ -0,0 +1,163 @@
+from array import array
+
+from adaptive import CLASS_NAMES, fact_class
+from game_state import OUTCOME_CORRECT
+
+# 응답 시간 히스토그램: 50ms 폭 200칸 (0~10초) + 초과 1칸
+HISTOGRAM_BUCKET_MS = 50
+HISTOGRAM_BUCKETS = 200
+
+# 집계 차원 (화면 표시 순서)
+DIMENSIONS = ("operation", "regroup", "range", "position")
+
+ROLLUP_SCHEMA = """
+CREATE TABLE IF NOT EXISTS answer_rollups (
+    dimension TEXT NOT NULL,
+    key TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    correct INTEGER NOT NULL,
+    sum_ms REAL NOT NULL,
+    histogram BLOB NOT NULL,
+    PRIMARY KEY (dimension, key)
+);
+"""
+
+
+class RollupCell:
+    """한 집계 칸의 문제 수, 정답 수, 응답 시간 합과 히스토그램 (서로 더할 수 있음)"""
+
+    __slots__ = ('count', 'correct', 'sum_ms', 'histogram')
+
+    def __init__(self, count=0, correct=0, sum_ms=0.0, histogram=None):
+        self.count = count
+        self.correct = correct
+        self.sum_ms = sum_ms
+        self.histogram = histogram if histogram is not None else array('I', [0]) * (HISTOGRAM_BUCKETS + 1)
+
+    def add(self, correct, response_ms):
+        self.count += 1
+        self.correct += correct
+        self.sum_ms += response_ms
+        self.histogram[min(int(response_ms // HISTOGRAM_BUCKET_MS), HISTOGRAM_BUCKETS)] += 1
+
+    def merge(self, other):
+        self.count += other.count
+        self.correct += other.correct
+        self.sum_ms += other.sum_ms
+        histogram = self.histogram
+        for i, value in enumerate(other.histogram):
+            if value:
+                histogram[i] += value
+
+    @property
+    def accuracy(self):
+        return self.correct / self.count if self.count else None
+
+    @property
+    def mean_ms(self):
+        return self.sum_ms / self.count if self.count else None
+
+    def quantile(self, q):
+        """근사 분위수 (ms, 칸 안에서는 선형 보간, 오차는 칸 폭 이내)"""
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        for i, value in enumerate(self.histogram):
+            if value and seen + value >= target:
+                return (i + (target - seen) / value) * HISTOGRAM_BUCKET_MS
+            seen += value
+        return HISTOGRAM_BUCKETS * HISTOGRAM_BUCKET_MS
+
+
+def answer_keys(position, left, operator, right):
+    """문제 하나가 속하는 (차원, 키) 목록"""
+    tens = left // 10 * 10
+    return (
+        ("operation", "덧셈" if operator == '+' else "뺄셈"),
+        ("regroup", CLASS_NAMES[fact_class(operator, left, right)]),
+        ("range", f"{tens}~{tens + 9}"),
+        ("position", f"{position + 1:02d}번"),
+    )
+
+
+def natural_key(key):
+    """정렬용 (앞 숫자, 문자열) 튜플 (숫자로 시작하지 않으면 숫자는 -1)"""
+    digits = len(key) - len(key.lstrip("0123456789"))
+    return (int(key[:digits]) if digits else -1, key)
+
+
+class Rollups:
+    """(차원, 키)별 RollupCell 묶음"""
+
+    def __init__(self):
+        self.cells = {}
+
+    def cell(self, dimension, key):
+        cell = self.cells.get((dimension, key))
+        if cell is None:
+            cell = self.cells[(dimension, key)] = RollupCell()
+        return cell
+
+    def add_answer(self, position, left, operator, right, outcome, response_ms):
+        correct = outcome == OUTCOME_CORRECT
+        for dimension, key in answer_keys(position, left, operator, right):
+            self.cell(dimension, key).add(correct, response_ms)
+
+    def add_record_rows(self, rows):
+        """result_store.game_record()의 문제별 행 목록 반영"""
+        for position, left, operator, right, _, _, outcome, response_ns, client_ms in rows:
+            response_ms = client_ms if client_ms is not None else response_ns / 1_000_000
+            self.add_answer(position, left, operator, right, outcome, response_ms)
+
+    def dimension(self, dimension):
+        """한 차원의 (키, RollupCell) 목록 (키 앞 숫자 순, "100번"이 "99번" 뒤에 오도록)"""
+        return sorted(
+            ((key, cell) for (dim, key), cell in self.cells.items() if dim == dimension),
+            key=lambda item: natural_key(item[0]),
+        )
+
+    def merge_into(self, conn):
+        """DB의 집계 행에 이 집계를 더함 (호출한 쪽의 트랜잭션 안에서 실행)"""
+        for (dimension, key), delta in self.cells.items():
+            row = conn.execute(
+                "SELECT count, correct, sum_ms, histogram FROM answer_rollups "
+                "WHERE dimension = ? AND key = ?",
+                (dimension, key),
+            ).fetchone()
+            cell = RollupCell()
+            if row is not None:
+                cell = RollupCell(row[0], row[1], row[2], array('I', row[3]))
+            cell.merge(delta)
+            conn.execute(
+                "INSERT OR REPLACE INTO answer_rollups VALUES (?, ?, ?, ?, ?, ?)",
+                (dimension, key, cell.count, cell.correct, cell.sum_ms, cell.histogram.tobytes()),
+            )
+
+
+def load_rollups(conn):
+    """DB의 집계 행만 읽어 Rollups로 반환 (원본 게임 기록은 읽지 않음)"""
+    rollups = Rollups()
+    for dimension, key, count, correct, sum_ms, histogram in conn.execute(
+        "SELECT dimension, key, count, correct, sum_ms, histogram FROM answer_rollups"
+    ):
+        rollups.cells[(dimension, key)] = RollupCell(count, correct, sum_ms, array('I', histogram))
+    return rollups
+
+
+def rebuild_rollups(conn, chunk_size=10000):
+    """원본 answers 테이블로 집계를 처음부터 다시 만듦 (집계 도입 전 기록 이관용)"""
+    rollups = Rollups()
+    cursor = conn.execute(
+        "SELECT position, left_operand, operator, right_operand, answer, user_answer, "
+        "outcome, response_ns, client_response_ms FROM answers"
+    )
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            break
+        rollups.add_record_rows(rows)
+    with conn:
+        conn.execute("DELETE FROM answer_rollups")
+        rollups.merge_into(conn)
+    return rollups
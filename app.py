@@ -1,288 +1,953 @@
+import time
+
+# 스크립트 실행 시간 측정 시작 (import 포함)
+_SCRIPT_START = time.perf_counter()
+
 import streamlit as st
+import functools
+import io
+import os
 import random
-import time
+import threading
+import uuid
+
+import html_fragments
+import problem_bank
+from engine import QuizEngine
+from metrics import INSTRUMENTATION, SCRIPT_TIMINGS
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from game_state import (
+    OUTCOME_CORRECT,
+    OUTCOME_INVALID,
+    OUTCOME_TIMEOUT,
+    OUTCOME_WRONG,
+)
+
+# 결과 저장, 순위표, 맞춤 모드, 마감 스케줄러, 상태 저장소 모듈은 시작 화면에 필요 없으므로
+# 처음 쓰는 함수 안에서 import (콜드 스타트의 첫 화면을 빠르게)
+SCRIPT_TIMINGS.record_imports(time.perf_counter() - _SCRIPT_START)
+
+# 타이머 모드: "client" = 브라우저가 카운트다운을 그리고 마감 시에만 재실행,
+#             "server" = 기존 방식 (0.1초마다 st.rerun()으로 타이머 갱신)
+TIMER_MODE = os.environ.get("QUIZ_TIMER_MODE", "client")
+
+# 기본 문제 수와 문제당 제한 시간(초). 시작 화면에서 아래 선택지 중 고를 수 있음
+QUESTION_COUNT = int(os.environ.get("QUIZ_QUESTION_COUNT", "10"))
+TIME_LIMIT = int(os.environ.get("QUIZ_TIME_LIMIT", "5"))
+QUESTION_COUNTS = sorted({10, 20, 50, 100, QUESTION_COUNT})
+TIME_LIMITS = sorted({3, 5, 10, TIME_LIMIT})
+
+# 앱에서 내려받는 학습지의 최대 페이지 수 (더 많으면 `python worksheet.py` 사용)
+WORKSHEET_MAX_PAGES = 200
+# st.download_button이 내용 대신 함수를 받아 누를 때 만드는지 (1.52부터)
+DOWNLOAD_ACCEPTS_CALLABLE = tuple(int(part) for part in st.__version__.split(".")[:2]) >= (1, 52)
+
+# 서버 측 마감 스케줄러 사용 여부 (재실행 없이 시간 초과 문제를 처리)
+USE_DEADLINE_SCHEDULER = os.environ.get("QUIZ_DEADLINE_SCHEDULER", "1") == "1"
+
+# 게임 결과 저장 파일 (빈 값이면 저장하지 않음)
+RESULTS_DB = os.environ.get("QUIZ_RESULTS_DB", "quiz_results.db")
+
+# 게임 상태 저장소: "memory" = 프로세스 메모리, "sqlite" = 여러 프로세스가 공유하는 SQLite 파일
+STATE_BACKEND = os.environ.get("QUIZ_STATE_BACKEND", "memory")
+STATE_DB = os.environ.get("QUIZ_STATE_DB", "quiz_state.db")
+
+# 계측: "1"이면 모든 세션의 함수 실행 시간/재실행 수를 기록 (아니면 ?instrument=1로 연 세션만)
+INSTRUMENT = os.environ.get("QUIZ_INSTRUMENT", "0") == "1"
+# 측정값 내보내기: 127.0.0.1:<포트>/metrics 또는 파일 (Prometheus 텍스트 형식, 빈 값이면 끔)
+METRICS_PORT = os.environ.get("QUIZ_METRICS_PORT", "")
+METRICS_FILE = os.environ.get("QUIZ_METRICS_FILE", "")
+# "1"이면 시작할 때 샘플링 프로파일러를 켬 (출력 파일은 QUIZ_PROFILE_FILE, 통계 페이지에서 켜고 끌 수 있음)
+PROFILE_ON_START = os.environ.get("QUIZ_PROFILE", "0") == "1"
+
+# 재접속/다른 프로세스에서도 같은 플레이어로 알아보기 위한 쿠키
+PLAYER_COOKIE = "quiz_player"
+PLAYER_COOKIE_SETTER = """
+<script>
+window.parent.document.cookie = "%s=%s; path=/; max-age=2592000; SameSite=Lax";
+</script>
+"""
+
+# static/styles.css, static/autofocus.js의 내용을 부모 문서에 한 번만 주입하는 로더
+# (Streamlit 정적 파일 서버는 버전에 따라 .css/.js를 text/plain + nosniff로 보내 브라우저가 적용하지 않으므로 인라인으로 전송)
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+STATIC_ASSET_LOADER = """
+<script>
+(function() {
+    const doc = window.parent.document;
+    if (!doc.getElementById('quiz-styles')) {
+        const style = doc.createElement('style');
+        style.id = 'quiz-styles';
+        style.textContent = %s;
+        doc.head.appendChild(style);
+    }
+    if (!doc.getElementById('quiz-autofocus')) {
+        const script = doc.createElement('script');
+        script.id = 'quiz-autofocus';
+        script.textContent = %s;
+        doc.head.appendChild(script);
+    }
+})();
+</script>
+"""
+
+# 게임 소개 (정적 HTML)
+GAME_RULES_HTML = """
+<div style='text-align: center; padding: 20px; background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); border-radius: 15px; color: white; margin: 20px 0;'>
+<h3>🎯 게임 소개</h3>
+<p style='font-size: 18px;'>두 자리 수 연산을 제한 시간 안에 풀어보세요!</p>
+</div>
+"""
+
+GAME_RULES_MARKDOWN = """
+**📋 게임 규칙:**
+- 문제 수(10~100문제)와 문제당 제한시간(3~10초)은 아래에서 고릅니다
+- 덧셈, 뺄셈, 또는 랜덤 연산이 나옵니다 (맞춤 모드는 자주 틀리거나 느린 문제 위주)
+- 제한시간을 초과하면 자동으로 오답 처리됩니다
+- 숫자 입력 후 Enter 키를 누르거나 제출 버튼을 클릭하세요
+"""
+
+# 연산 모드 표시 이름
+MODE_NAMES = {"random": "랜덤", "addition": "덧셈", "subtraction": "뺄셈", "adaptive": "맞춤"}
+
+# 다 푼 참가자의 결과 화면에서 경주 순위를 다시 읽는 주기 (초)
+RACE_STANDINGS_REFRESH = 1.0
+
+# 상세 결과 표의 결과 코드별 표시
+OUTCOME_LABELS = {
+    OUTCOME_CORRECT: "✅ 정답",
+    OUTCOME_WRONG: "❌ 오답",
+    OUTCOME_TIMEOUT: "❌ 시간 초과",
+    OUTCOME_INVALID: "❌ 오답",
+}
+
+# 게임 로직 (Streamlit 화면은 이 엔진 위의 얇은 어댑터)
+# app.py는 실행마다 다시 실행되므로 프로세스에 하나만 있어야 하는 객체는 캐시 리소스로 보관
+@st.cache_resource
+def get_engine():
+    return QuizEngine(question_count=QUESTION_COUNT, time_limit=TIME_LIMIT)
+
+@st.cache_resource
+def get_answer_lock():
+    """스크립트 스레드와 스케줄러 스레드가 동시에 답안을 처리하지 않도록 보호하는 잠금"""
+    return threading.RLock()
+
+ENGINE = get_engine()
+_answer_lock = get_answer_lock()
+
+def instrumentation_active():
+    """이번 실행을 계측할지 (환경 변수로 켰거나 ?instrument=1로 연 세션)"""
+    if INSTRUMENT:
+        return True
+    # check_answer()는 스케줄러 스레드에서도 불리므로 컨텍스트가 없을 때 경고하지 않음
+    ctx = get_script_run_ctx(suppress_warning=True)
+    return ctx is not None and "instrument" in ctx.session_state
+
+def instrumented(name):
+    """계측이 켜져 있을 때 함수 실행 시간을 기록하는 데코레이터"""
+    return INSTRUMENTATION.timed(name, instrumentation_active)
+
+@st.cache_resource
+def start_metrics_exporters():
+    """설정된 측정값 내보내기와 프로파일러를 프로세스에서 한 번만 시작"""
+    from metrics import serve_metrics, write_metrics_file
+    if METRICS_PORT:
+        serve_metrics(int(METRICS_PORT))
+    if METRICS_FILE:
+        write_metrics_file(METRICS_FILE)
+    if PROFILE_ON_START:
+        from profiler import PROFILER
+        PROFILER.start()
+    return True
+
+def rerun(reason):
+    """st.rerun() (계측 중이면 호출 위치와 다음 실행까지의 지연을 기록)"""
+    if instrumentation_active():
+        INSTRUMENTATION.inc("quiz_st_rerun_total", (("reason", reason),))
+        st.session_state.rerun_requested_at = time.perf_counter()
+    st.rerun()
+
+def record_run(kind):
+    """계측 중이면 실행 수를 전체/세션/문제별로 기록"""
+    if not instrumentation_active():
+        return
+    INSTRUMENTATION.inc("quiz_reruns_total", (("kind", kind),))
+    ctx = get_script_run_ctx()
+    if ctx is not None:
+        INSTRUMENTATION.inc("quiz_session_reruns_total", (("session", ctx.session_id[:8]),))
+    game = st.session_state.game
+    if game is not None and not game.game_finished:
+        INSTRUMENTATION.inc("quiz_question_reruns_total", (("kind", kind), ("question", game.current_question + 1)))
+    requested_at = st.session_state.pop("rerun_requested_at", None)
+    if requested_at is not None:
+        INSTRUMENTATION.observe("quiz_rerun_gap_seconds", time.perf_counter() - requested_at)
 
 def init_session_state():
-    """세션 상태 초기화"""
+    """세션 상태 초기화. 세션의 첫 실행이면 True"""
+    first_run = 'game' not in st.session_state
+    # 게임 관련 상태는 모두 GameState 하나에 담김 (게임 전에는 None)
     defaults = {
-        'game_started': False,
-        'current_question': 0,
-        'score': 0,
-        'questions': [],
-        'answers': [],
-        'user_answers': [],
-        'question_start_time': None,
-        'game_finished': False,
-        'show_result': False,
-        'last_result': "",
-        'operation_mode': "random"
+        'game': None,
+        'operation_mode': "random",
+        'question_count': QUESTION_COUNT,
+        'time_limit': TIME_LIMIT,
+        'player_id': None,
+        # 참가 중인 교실 경주 방 코드 (없으면 None)
+        'race_room': None
     }
     
     for key, value in defaults.items():
         if key not in st.session_state:
             st.session_state[key] = value
+    if first_run and st.query_params.get("instrument") == "1":
+        st.session_state.instrument = True
+    return first_run
 
-def generate_question():
-    """두 자리 수 연산 문제 생성"""
-    num1 = random.randint(10, 99)
-    num2 = random.randint(10, 99)
-    
+def generate_all_questions(quiz_code=None):
+    """선택한 문제 수만큼 미리 생성 (퀴즈 코드가 있으면 코드로 결정되는 문제)"""
     mode = st.session_state.operation_mode
-    
-    if mode == "addition":
-        operation = '+'
-        answer = num1 + num2
-    elif mode == "subtraction":
-        operation = '-'
-        if num1 < num2:
-            num1, num2 = num2, num1
-        answer = num1 - num2
-    else:  # 랜덤
-        if random.choice([True, False]):
-            operation = '+'
-            answer = num1 + num2
-        else:
-            operation = '-'
-            if num1 < num2:
-                num1, num2 = num2, num1
-            answer = num1 - num2
-    
-    question = f"{num1} {operation} {num2}"
-    return question, answer
-
-def generate_all_questions():
-    """10개의 문제 미리 생성"""
-    questions = []
-    answers = []
-    for _ in range(10):
-        question, answer = generate_question()
-        questions.append(question)
-        answers.append(answer)
-    return questions, answers
-
-def start_game():
-    """게임 시작"""
-    st.session_state.update({
-        'game_started': True,
-        'current_question': 0,
-        'score': 0,
-        'game_finished': False,
-        'show_result': False,
-        'user_answers': [],
-        'last_result': "",
-        'question_start_time': time.time()
-    })
-    
-    st.session_state.questions, st.session_state.answers = generate_all_questions()
-    st.rerun()
+    count = st.session_state.question_count
+    if quiz_code is not None:
+        return load_quiz(quiz_code, mode, count)
+    return ENGINE.draw_questions(mode, stats=get_player_stats(), count=count)
+
+@st.cache_data(max_entries=10000, show_spinner=False)
+def load_quiz(quiz_code, mode, count):
+    """퀴즈 코드별 문제 세트 (같은 코드를 쓰는 모든 세션이 공유, 짧은 퀴즈는 긴 퀴즈의 앞부분)"""
+    return ENGINE.draw_questions(mode, quiz_code, count=count)
 
-def check_answer():
-    """답안 확인 및 처리"""
-    current_idx = st.session_state.current_question
-    correct_answer = st.session_state.answers[current_idx]
-    user_input = st.session_state.get(f"answer_input", "")
+@instrumented("start_game")
+def start_game(quiz_code=None):
+    """게임 시작 (quiz_code가 없으면 새 퀴즈 코드 발급, 맞춤 모드는 코드 없이 통계로 출제)"""
+    mode = st.session_state.operation_mode
+    quiz_code = problem_bank.normalize_quiz_code(quiz_code)
+    if quiz_code is None and mode != "adaptive":
+        quiz_code = problem_bank.new_quiz_code()
     
-    # 시간 확인
-    elapsed_time = time.time() - st.session_state.question_start_time
+    game = ENGINE.new_game(mode, quiz_code, generate_all_questions(quiz_code),
+                           time_limit=st.session_state.time_limit)
+    st.session_state.game = game
+    store_game()
     
-    if elapsed_time > 5.0:  # 5초 초과
-        st.session_state.user_answers.append(None)
-        st.session_state.last_result = f"⏰ 시간 초과! 정답은 {correct_answer}입니다."
-    else:
+    # 주소창의 링크로 같은 퀴즈를 공유할 수 있도록 기록
+    if quiz_code:
+        st.query_params["quiz"] = quiz_code
+    elif "quiz" in st.query_params:
+        del st.query_params["quiz"]
+    st.query_params["mode"] = mode
+    st.query_params["n"] = str(len(game))
+    st.query_params["t"] = str(st.session_state.time_limit)
+    rerun("start_game")
+
+@instrumented("check_answer")
+def check_answer(state=None, timed_out=False, backend=None, hub=None, game=None, question_idx=None):
+    """답안 확인 및 처리. 상태 저장소에 기록했으면 True (다른 프로세스가 먼저 바꿨으면 False)
+
+    game과 question_idx를 주면 잠금을 잡은 뒤에도 그 게임의 그 문제일 때만 처리하고, 아니면 False
+    """
+    # state와 backend/hub를 넘기면 스크립트 스레드 밖(마감 스케줄러)에서도 호출 가능
+    # (cache_resource 함수는 ScriptRunContext가 없는 스레드에서 부르면 경고를 남김)
+    if state is None:
+        state = st.session_state
+
+    with _answer_lock:
+        # 잠금을 기다리는 동안 마감 스케줄러가 이 문제를 이미 넘겼으면 다음 문제를 빈 답으로 채점하지 않음
+        if game is not None and (state.game is not game or game.game_finished
+                                 or game.current_question != question_idx):
+            return False
+
+        # 입력칸은 문제마다 키가 달라 다음 문제에서 자동으로 비워짐
         try:
-            user_answer = int(user_input.strip()) if user_input.strip() else None
-            st.session_state.user_answers.append(user_answer)
-            
-            if user_answer == correct_answer:
-                st.session_state.score += 1
-                st.session_state.last_result = "✅ 정답입니다!"
-            else:
-                st.session_state.last_result = f"❌ 틀렸습니다. 정답은 {correct_answer}입니다."
-        except ValueError:
-            st.session_state.user_answers.append(None)
-            st.session_state.last_result = f"❌ 올바른 숫자를 입력해주세요. 정답은 {correct_answer}입니다."
-    
-    # 다음 문제로 바로 이동 (결과 표시는 동시에)
-    if st.session_state.current_question < 9:
-        st.session_state.current_question += 1
-        st.session_state.question_start_time = time.time()
-        st.session_state.show_result = True
+            user_input = state[answer_input_key(state.game)]
+        except KeyError:
+            user_input = ""
+
+        # 브라우저가 잰 응답 시간 (클라이언트 타이머 모드에서만 채워짐)
+        try:
+            client_ms = int(state[client_time_key(state.game)])
+        except (KeyError, TypeError, ValueError):
+            client_ms = None
+
+        # 채점, 시간 초과 판정, 다음 문제 이동은 엔진이 처리
+        ENGINE.submit(state.game, user_input, timed_out=timed_out, client_ms=client_ms)
+        stored = store_game(state, backend)
+        report_race_progress(state, hub)
+        return stored
+
+def answer_input_key(game):
+    """현재 문제의 입력칸 위젯 키"""
+    return f"answer_input_{game.current_question}"
+
+def client_time_key(game):
+    """현재 문제의 브라우저 응답 시간(숨김 필드) 위젯 키"""
+    return f"client_ms_{game.current_question}"
+
+def result_message(game):
+    """직전 문제 결과 메시지"""
+    correct_answer = game.answers[game.last_answered()]
+    return {
+        OUTCOME_CORRECT: "✅ 정답입니다!",
+        OUTCOME_WRONG: f"❌ 틀렸습니다. 정답은 {correct_answer}입니다.",
+        OUTCOME_TIMEOUT: f"⏰ 시간 초과! 정답은 {correct_answer}입니다.",
+        OUTCOME_INVALID: f"❌ 올바른 숫자를 입력해주세요. 정답은 {correct_answer}입니다.",
+    }[game.last_outcome]
+
+def display_last_result(game):
+    """직전 문제 결과 배너"""
+    if game.last_outcome == OUTCOME_CORRECT:
+        st.success(f"🎉 {result_message(game)}")
     else:
-        st.session_state.game_finished = True
+        st.error(f"😅 {result_message(game)}")
+
+def reset_game(quiz_code=None):
+    """게임 리셋 (quiz_code를 주면 시작 화면에 같은 퀴즈 코드를 채워 둠)"""
+    # 게임 상태는 객체 하나이므로 교체만 하면 됨
+    st.session_state.game = None
+    store_game()
+    leave_race()
     
-    # 입력 필드 초기화
-    if 'answer_input' in st.session_state:
-        del st.session_state['answer_input']
-
-def next_question():
-    """다음 문제로 이동"""
-    if st.session_state.current_question < 9:
-        st.session_state.current_question += 1
-        st.session_state.show_result = False
-        st.session_state.question_start_time = time.time()
+    if quiz_code:
+        st.query_params["quiz"] = quiz_code
+    elif "quiz" in st.query_params:
+        del st.query_params["quiz"]
+    rerun("reset_game")
+
+def embed_html(body, height=0):
+    """스크립트가 든 HTML을 iframe으로 삽입 (height=0이면 보이지 않는 스크립트 전용)"""
+    # components.html은 Streamlit 1.56부터 폐기 예정이고 st.iframe이 대체하므로 st.iframe을 우선 사용.
+    # st.iframe은 높이 0을 받지 않으므로 보이지 않는 스크립트는 내용 높이에 맞춤
+    if hasattr(st, "iframe"):
+        st.iframe(body, height=height or "content")
     else:
-        st.session_state.game_finished = True
-
-def reset_game():
-    """게임 리셋"""
-    # 모든 관련 세션 상태 초기화
-    keys_to_delete = [key for key in list(st.session_state.keys()) if key.startswith('answer_input')]
-    for key in keys_to_delete:
-        del st.session_state[key]
-    
-    st.session_state.update({
-        'game_started': False,
-        'current_question': 0,
-        'score': 0,
-        'game_finished': False,
-        'show_result': False,
-        'last_result': "",
-        'questions': [],
-        'answers': [],
-        'user_answers': [],
-        'question_start_time': None
-    })
-    st.rerun()
+        import streamlit.components.v1 as components
+        components.html(body, height=height)
+
+@st.cache_resource
+def get_state_backend():
+    """프로세스 공용 게임 상태 저장소"""
+    from state_backend import create_backend
+    return create_backend(STATE_BACKEND, STATE_DB)
+
+@instrumented("sync_session_state")
+def sync_session_state():
+    """플레이어를 식별하고 저장소의 게임 상태를 이번 실행의 세션 상태로 가져옴"""
+    if st.session_state.player_id is None:
+        player_id = st.context.cookies.get(PLAYER_COOKIE)
+        # 쿠키를 읽을 수 없는 환경(AppTest 등)에서는 문자열이 아닌 값이 올 수 있음
+        if not isinstance(player_id, str) or not player_id:
+            # 처음 온 플레이어: 새 ID를 쿠키로 남겨 재접속 시에도 같은 상태를 쓰도록 함
+            player_id = uuid.uuid4().hex
+            embed_html(PLAYER_COOKIE_SETTER % (PLAYER_COOKIE, player_id))
+        st.session_state.player_id = player_id
+    st.session_state.game = get_state_backend().load(st.session_state.player_id, 'game')
+
+def store_game(state=None, backend=None):
+    """세션의 게임 상태를 저장소에 기록 (게임이 없으면 삭제). 다른 프로세스가 먼저 바꿨으면 False"""
+    if state is None:
+        state = st.session_state
+    if backend is None:
+        backend = get_state_backend()
+    if state.game is None:
+        backend.delete(state.player_id, 'game')
+        return True
+    return backend.save(state.player_id, 'game', state.game)
+
+@st.cache_resource
+def get_deadline_scheduler():
+    """프로세스 공용 마감 스케줄러 (큐 깊이와 발화 지연은 측정값과 통계 페이지로)"""
+    from deadline_scheduler import DeadlineScheduler
+    scheduler = DeadlineScheduler()
+    INSTRUMENTATION.add_collector(scheduler.prometheus_lines)
+    INSTRUMENTATION.add_status("마감 스케줄러", scheduler.stats)
+    return scheduler
+
+@st.cache_resource
+def get_result_store():
+    """프로세스 공용 결과 저장소 (백그라운드 일괄 기록, 큐 적재량과 역압은 측정값과 통계 페이지로)"""
+    if not RESULTS_DB:
+        return None
+    from result_store import ResultStore
+    store = ResultStore(RESULTS_DB)
+    INSTRUMENTATION.add_collector(store.prometheus_lines)
+    INSTRUMENTATION.add_status("결과 저장소", store.stats)
+    return store
+
+@st.cache_resource
+def get_leaderboards():
+    """프로세스 공용 모드별 순위표 (시작 시 저장된 결과로 한 번만 채움)"""
+    from leaderboard import Leaderboards
+    boards = Leaderboards()
+    store = get_result_store()
+    if store is not None:
+        boards.load(store.leaderboard_rows())
+    return boards
+
+def get_player_stats(game=None):
+    """이 플레이어의 문제별 통계 (저장소에 없으면 game을 줄 때만 그 게임의 제한 시간으로 새로 생성)"""
+    stats = get_state_backend().load(st.session_state.player_id, 'stats')
+    if stats is None and game is not None:
+        from adaptive import PlayerStats
+        stats = PlayerStats(game.time_limit_ns // 1_000_000)
+    return stats
+
+@instrumented("save_game_result")
+def save_game_result(game):
+    """끝난 게임 결과를 한 번만 저장 대기열, 순위표, 플레이어 통계에 넣음"""
+    if game.result_saved:
+        return
+    game.result_saved = True
+    store_game()
+    # 문제별 통계(플레이어당 약 48KB, 맞춤 출제 트리 포함 약 98KB)는 맞춤 모드를 한 번이라도 쓴 플레이어에게만 만들고, 그 뒤로는 모든 모드의 게임을 반영
+    stats = get_player_stats(game if game.mode == "adaptive" else None)
+    if stats is not None:
+        stats.record_game(game)
+        get_state_backend().save(st.session_state.player_id, 'stats', stats)
+    get_leaderboards().add_game(game)
+    store = get_result_store()
+    if store is not None:
+        store.submit(game)
+
+def request_session_rerun(session_id):
+    """백그라운드 스레드에서 특정 세션에 재실행 한 번 요청"""
+    try:
+        from streamlit.runtime import Runtime
+        info = Runtime.instance()._session_mgr.get_active_session_info(session_id)
+    except Exception:
+        return False
+    if info is None:
+        return False
+    info.session.request_rerun(None)
+    return True
+
+def expire_question(session_id, state, game, question_idx, start_time, scheduler, backend, hub):
+    """마감 시각 도달 시 해당 문제를 시간 초과로 처리하고 재실행 요청 (스케줄러 스레드에서 호출)"""
+    with _answer_lock:
+        # 이미 답했거나 게임이 바뀐 경우 무시
+        if (state.game is not game or game.game_finished
+                or game.current_question != question_idx
+                or game.question_start_time != start_time):
+            return
+        # 플레이어가 다른 프로세스로 옮겨 가 저장소의 게임이 더 새로우면 이 프로세스의 옛 세션은 손대지 않음
+        # (저장소는 version이 그대로일 때만 같은 객체를 돌려주므로 is 비교가 곧 version 비교)
+        if backend.load(state.player_id, 'game') is not game:
+            return
+        if not check_answer(state, timed_out=True, backend=backend, hub=hub):
+            return
+        # 재실행이 늦어지거나 실패해도 다음 문제 마감은 바로 예약
+        schedule_question_deadline(session_id, state, game, scheduler, backend, hub)
+    request_session_rerun(session_id)
+
+def schedule_question_deadline(session_id, state, game, scheduler, backend, hub):
+    """게임의 현재 문제 마감 시각을 스케줄러에 예약 (같은 문제면 중복 예약하지 않음)
+
+    콜백은 스케줄러 스레드에서 실행되므로 저장소, 스케줄러, 경주 허브는 예약할 때 잡아 둔 객체를 씀
+    """
+    if game is None:
+        return
+    # 예약된 콜백이 game을 참조하므로 예약이 남아 있는 동안 id(game)는 재사용되지 않음
+    key = (session_id, id(game))
+    if game.game_finished:
+        scheduler.cancel(key)
+        return
+
+    question_idx = game.current_question
+    start_time = game.question_start_time
+    scheduler.schedule(
+        key,
+        # 엔진 시계(monotonic_ns)와 스케줄러 시계(monotonic)는 같은 시계의 다른 단위
+        ENGINE.deadline(game) / 1_000_000_000,
+        lambda: expire_question(session_id, state, game, question_idx, start_time, scheduler, backend, hub),
+        token=(question_idx, start_time),
+    )
+
+def arm_question_deadline():
+    """현재 세션의 문제 마감 시각 예약"""
+    if not USE_DEADLINE_SCHEDULER:
+        return
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return
+    hub = get_race_hub() if st.session_state.race_room is not None else None
+    schedule_question_deadline(ctx.session_id, ctx.session_state, st.session_state.game,
+                               get_deadline_scheduler(), get_state_backend(), hub)
+
+@st.cache_resource
+def get_race_hub():
+    """프로세스 공용 교실 경주 허브 (경주를 쓸 때만 import)"""
+    from race_room import RaceHub
+    return RaceHub()
 
+def race_notifier(session_id, state):
+    """허브 알림을 받아 세션 재실행을 요청하는 콜백 (허브 스레드에서 호출)"""
+    from race_room import EVENT_STANDINGS
+
+    def notify(kind, snapshot):
+        # 문제를 푸는 중인 참가자는 순위 변화로 방해하지 않고, 기다리는 중인 참가자만 갱신.
+        # 다 푼 참가자의 결과 화면 순위는 프래그먼트가 따로 갱신하므로 전체 재실행하지 않음
+        game = state.game
+        if (kind == EVENT_STANDINGS and game is not None and game.quiz_code == snapshot.code
+                and (game.game_finished or game.current_question <= snapshot.question)):
+            return
+        request_session_rerun(session_id)
+    return notify
+
+def race_player_name(name):
+    return (name or "").strip()[:20] or f"플레이어 {st.session_state.player_id[:4]}"
+
+def enter_race(code):
+    """경주 방에 들어간 세션 상태로 전환"""
+    st.session_state.race_room = code
+    st.session_state.game = None
+    store_game()
+    st.query_params["room"] = code
+    rerun("race_join")
+
+def create_race(name):
+    """시작 화면에서 고른 모드/문제 수/제한 시간으로 방을 만들고 방장으로 입장"""
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return
+    code = get_race_hub().create_room(
+        st.session_state.operation_mode, st.session_state.question_count, st.session_state.time_limit,
+        st.session_state.player_id, race_player_name(name), race_notifier(ctx.session_id, ctx.session_state),
+    )
+    enter_race(code)
+
+def join_race(code, name):
+    """방 코드로 입장 (시작 전 방, 또는 이미 참가 중인 방에 다시 접속)"""
+    code = problem_bank.normalize_quiz_code(code)
+    ctx = get_script_run_ctx()
+    snapshot = None
+    if code is not None and ctx is not None:
+        snapshot = get_race_hub().join(
+            code, st.session_state.player_id, race_player_name(name),
+            race_notifier(ctx.session_id, ctx.session_state),
+        )
+    if snapshot is None:
+        st.error("입장할 수 없는 방입니다. 방 코드를 확인하거나, 이미 시작한 방인지 확인하세요.")
+        return
+    enter_race(code)
+
+def leave_race():
+    """참가 중인 경주 방에서 나감 (재실행은 호출한 쪽에서)"""
+    code = st.session_state.race_room
+    if code is None:
+        return
+    get_race_hub().leave(code, st.session_state.player_id)
+    st.session_state.race_room = None
+    if "room" in st.query_params:
+        del st.query_params["room"]
+
+def report_race_progress(state, hub=None):
+    """채점 직후 경주 방에 점수 보고 (check_answer()에서 호출, 경주 중이 아니면 무시)"""
+    code = state.race_room
+    game = state.game
+    if code is None or game is None or game.quiz_code != code:
+        return
+    from leaderboard import total_time_ms
+    if hub is None:
+        hub = get_race_hub()
+    answered = len(game) if game.game_finished else game.current_question
+    hub.report(code, state.player_id, answered, game.score, total_time_ms(game))
+
+def sync_race():
+    """참가 중인 방의 최신 상태를 게임에 반영. 경주 중이 아니면 None
+
+    방이 문제를 시작했으면 그 문제의 시작 시각을 모두 같게 맞추고, 놓친 문제는 시간 초과로 처리합니다.
+    """
+    code = st.session_state.race_room
+    if code is None:
+        return None
+    race = get_race_hub().snapshot(code)
+    player_id = st.session_state.player_id
+    if race is None or not any(standing.player == player_id for standing in race.standings):
+        # 방이 닫혔거나 이 세션이 나간 방
+        st.session_state.race_room = None
+        return None
+
+    game = st.session_state.game
+    if race.question < 0:
+        return race
+    if game is None or game.quiz_code != race.code:
+        game = ENGINE.new_game(race.mode, race.code, load_quiz(race.code, race.mode, race.count),
+                               time_limit=race.time_limit)
+        st.session_state.game = game
+    with _answer_lock:
+        while not game.game_finished and game.current_question < race.question:
+            check_answer(timed_out=True)
+        if (not game.game_finished and game.current_question == race.question
+                and game.question_start_time != race.question_started_ns):
+            game.question_start_time = race.question_started_ns
+            store_game()
+    return race
+
+def race_waiting(game, race):
+    """다른 참가자를 기다리는 중인지 (답을 내고 방이 다음 문제를 시작하기 전)"""
+    return (race is not None and game is not None and game.quiz_code == race.code
+            and not game.game_finished and game.current_question > race.question)
+
+@instrumented("display_game_rules")
 def display_game_rules():
     """게임 규칙 표시"""
-    st.markdown("""
-    <div style='text-align: center; padding: 20px; background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); border-radius: 15px; color: white; margin: 20px 0;'>
-    <h3>🎯 게임 소개</h3>
-    <p style='font-size: 18px;'>두 자리 수 연산을 5초 이내에 풀어보세요!</p>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    st.markdown("""
-    **📋 게임 규칙:**
-    - 총 10문제가 출제됩니다
-    - 각 문제당 제한시간은 5초입니다  
-    - 덧셈, 뺄셈, 또는 랜덤 연산이 나옵니다
-    - 5초를 초과하면 자동으로 오답 처리됩니다
-    - 숫자 입력 후 Enter 키를 누르거나 제출 버튼을 클릭하세요
-    """)
+    st.markdown(GAME_RULES_HTML, unsafe_allow_html=True)
+    st.markdown(GAME_RULES_MARKDOWN)
     
     # 연산 모드 선택
     st.markdown("**🎮 연산 모드 선택:**")
+    modes = ["random", "addition", "subtraction", "adaptive"]
+    url_mode = st.query_params.get("mode")
     operation_mode = st.selectbox(
         "연산 종류를 선택하세요:",
-        ["random", "addition", "subtraction"],
+        modes,
+        index=modes.index(url_mode) if url_mode in modes else 0,
         format_func=lambda x: {"random": "🎲 랜덤 (덧셈+뺄셈)", 
                               "addition": "➕ 덧셈만", 
-                              "subtraction": "➖ 뺄셈만"}[x],
+                              "subtraction": "➖ 뺄셈만",
+                              "adaptive": "🧠 맞춤 (약한 문제 위주)"}[x],
         key="operation_select"
     )
     st.session_state.operation_mode = operation_mode
+    
+    # 문제 수와 제한 시간 (주소창 값이 있으면 그대로 사용해 공유한 퀴즈를 같은 조건으로 재현)
+    col1, col2 = st.columns(2)
+    with col1:
+        url_count = st.query_params.get("n", "")
+        st.session_state.question_count = st.selectbox(
+            "📝 문제 수",
+            QUESTION_COUNTS,
+            index=QUESTION_COUNTS.index(int(url_count) if url_count.isdigit() and int(url_count) in QUESTION_COUNTS
+                                        else st.session_state.question_count),
+            format_func=lambda x: f"{x}문제",
+            key="question_count_select"
+        )
+    with col2:
+        url_limit = st.query_params.get("t", "")
+        st.session_state.time_limit = st.selectbox(
+            "⏱️ 문제당 제한 시간",
+            TIME_LIMITS,
+            index=TIME_LIMITS.index(int(url_limit) if url_limit.isdigit() and int(url_limit) in TIME_LIMITS
+                                    else st.session_state.time_limit),
+            format_func=lambda x: f"{x}초",
+            key="time_limit_select"
+        )
+    
+    # 퀴즈 코드 (같은 코드와 문제 수 = 같은 문제)
+    st.markdown("**🔑 퀴즈 코드:**")
+    st.text_input(
+        "퀴즈 코드",
+        value=st.query_params.get("quiz", ""),
+        key="quiz_code_input",
+        placeholder="비워 두면 새 퀴즈",
+        label_visibility="collapsed"
+    )
+
+@instrumented("display_worksheet_export")
+def display_worksheet_export():
+    """인쇄용 학습지와 정답지 내려받기 (위에서 고른 모드와 문제 수 사용)"""
+    import worksheet
+
+    with st.expander("🖨️ 학습지 내보내기", expanded=False):
+        with st.form("worksheet_form"):
+            col1, col2 = st.columns(2)
+            pages = col1.number_input("페이지 수 (페이지마다 퀴즈 하나)", 1, WORKSHEET_MAX_PAGES, 10)
+            fmt = col2.selectbox("형식", worksheet.FORMATS, format_func=str.upper)
+            submitted = st.form_submit_button("만들기", use_container_width=True)
+        if submitted:
+            # 학습지와 정답지는 같은 시드로 만들어 퀴즈 코드와 문제를 맞춤.
+            # 시드가 내용을 결정하므로 세션에는 설정만 두고 파일은 내려받을 때 다시 만듦 (세션당 수 MB 절약)
+            st.session_state.worksheet_export = (
+                fmt, random.randrange(2 ** 32), pages,
+                st.session_state.operation_mode, st.session_state.question_count,
+            )
+
+        export = st.session_state.get("worksheet_export")
+        if export is None:
+            st.caption(f"{WORKSHEET_MAX_PAGES}페이지 넘게 만들 때는 `python worksheet.py --help`를 참고하세요.")
+            return
+        fmt, seed = export[:2]
+        col1, col2 = st.columns(2)
+        col1.download_button("📄 학습지", worksheet_download(*export, answer_key=False),
+                             f"worksheet_{seed}.{fmt}", worksheet.MIME_TYPES[fmt], use_container_width=True)
+        col2.download_button("🔑 정답지", worksheet_download(*export, answer_key=True),
+                             f"answers_{seed}.{fmt}", worksheet.MIME_TYPES[fmt], use_container_width=True)
 
+def render_worksheet(fmt, seed, pages, mode, count, answer_key):
+    """학습지(answer_key면 정답지) 파일 내용 (같은 설정과 시드면 항상 같은 바이트열)"""
+    import worksheet
+    buffer = io.BytesIO()
+    worksheet.write_worksheets(buffer, pages, fmt, answer_key, mode, count, seed)
+    return buffer.getvalue()
+
+def worksheet_download(fmt, seed, pages, mode, count, answer_key):
+    """download_button에 넘길 내용: 함수를 받는 버전이면 누를 때 만들고, 아니면 지금 만든 바이트열"""
+    if DOWNLOAD_ACCEPTS_CALLABLE:
+        return functools.partial(render_worksheet, fmt, seed, pages, mode, count, answer_key)
+    return render_worksheet(fmt, seed, pages, mode, count, answer_key)
+
+@instrumented("display_race_entry")
+def display_race_entry():
+    """교실 경주 방 만들기/입장 (위에서 고른 모드, 문제 수, 제한 시간으로 방을 만듦)"""
+    with st.expander("🏁 교실 경주", expanded="room" in st.query_params):
+        st.caption("같은 방에 들어온 친구들과 같은 문제를 동시에 풀고 실시간 순위를 봅니다.")
+        name = st.text_input("이름", key="race_name", max_chars=20, placeholder="화면에 표시할 이름")
+        col1, col2 = st.columns(2)
+        with col1:
+            code = st.text_input(
+                "방 코드",
+                value=st.query_params.get("room", ""),
+                key="race_code_input",
+                placeholder="방 코드",
+                label_visibility="collapsed"
+            )
+            if st.button("🚪 입장", use_container_width=True):
+                join_race(code, name)
+        with col2:
+            if st.button("➕ 방 만들기", use_container_width=True):
+                create_race(name)
+
+@instrumented("display_race_standings")
+def display_race_standings(race):
+    """경주 방 순위 (참가자 수와 무관하게 표 하나로 전송)"""
+    standings = race.standings
+    player_id = st.session_state.player_id
+    my_rank = next((i + 1 for i, standing in enumerate(standings) if standing.player == player_id), None)
+    st.markdown(f"**🏁 실시간 순위** · 내 순위 {my_rank}위 / {len(standings)}명")
+    st.dataframe(
+        {
+            "순위": range(1, len(standings) + 1),
+            "이름": [standing.name + (" (나)" if standing.player == player_id else "") for standing in standings],
+            "점수": [standing.score for standing in standings],
+            "푼 문제": [f"{standing.answered}/{race.count}" for standing in standings],
+            "총 시간 (초)": [round(standing.total_ms / 1000, 2) for standing in standings],
+        },
+        hide_index=True,
+        use_container_width=True,
+        height=min(len(standings), 10) * 35 + 38,
+    )
+
+@st.fragment(run_every=RACE_STANDINGS_REFRESH)
+def display_race_final_standings(code):
+    """결과 화면의 경주 순위 (다른 참가자가 끝나는 동안 이 영역만 주기적으로 다시 그림)"""
+    race = get_race_hub().snapshot(code)
+    if race is not None:
+        display_race_standings(race)
+
+@instrumented("display_race_lobby")
+def display_race_lobby(race):
+    """경주 시작 전 대기실"""
+    from race_room import ROOM_LOBBY
+
+    st.markdown(f"### 🏁 경주 방 `{race.code}`")
+    st.caption(f"{MODE_NAMES[race.mode]} · {race.count}문제 · 문제당 {race.time_limit:g}초 · "
+               f"참가자 {len(race.standings)}명 · 주소창의 링크나 방 코드로 입장할 수 있습니다")
+    if race.state != ROOM_LOBBY:
+        st.info("⏳ 곧 첫 문제가 시작됩니다!")
+    elif race.host == st.session_state.player_id:
+        if st.button("🚦 경주 시작", type="primary", use_container_width=True):
+            get_race_hub().start(race.code, st.session_state.player_id)
+            rerun("race_start")
+    else:
+        st.info("⏳ 방장이 경주를 시작하기를 기다리는 중...")
+    st.dataframe({"참가자": [standing.name for standing in race.standings]},
+                 hide_index=True, use_container_width=True,
+                 height=min(len(race.standings), 10) * 35 + 38)
+    if st.button("🚪 나가기", use_container_width=True):
+        leave_race()
+        rerun("race_leave")
+
+@instrumented("display_race_waiting")
+def display_race_waiting(game, race):
+    """답을 낸 뒤 다음 문제가 시작될 때까지 결과와 순위 표시 (방 알림이 오면 재실행)"""
+    if game.show_result:
+        display_last_result(game)
+    st.info(f"⏳ 다른 참가자를 기다리는 중... 곧 {game.current_question + 1}번 문제가 시작됩니다")
+    display_race_standings(race)
+
+@instrumented("display_question_with_timer")
 def display_question_with_timer():
     """문제와 실시간 타이머 표시"""
-    current_idx = st.session_state.current_question
-    elapsed = time.time() - st.session_state.question_start_time
-    remaining = max(0, 5 - elapsed)
+    game = st.session_state.game
+    current_idx = game.current_question
+    remaining = ENGINE.remaining(game)
     
-    # 현재 문제 표시
-    st.markdown(f"""
-    <div style='text-align: center; padding: 20px 0;'>
-    <h2>문제 {current_idx + 1}/10</h2>
-    <h1 style='font-size: 4em; color: #1f77b4; margin: 20px 0; text-shadow: 2px 2px 4px rgba(0,0,0,0.1);'>{st.session_state.questions[current_idx]} = ?</h1>
-    </div>
-    """, unsafe_allow_html=True)
+    # 현재 문제 표시 (HTML 조각은 html_fragments의 LRU에서 재사용)
+    st.markdown(html_fragments.question_header(current_idx, len(game), game.question_text(current_idx)),
+                unsafe_allow_html=True)
     
     # 남은 시간 표시
+    if remaining > 0 and TIMER_MODE == "client":
+        display_client_timer(current_idx, remaining, game.time_limit)
+        return True
     if remaining > 0:
-        color = "#ff4444" if remaining <= 1 else "#ff8800" if remaining <= 2 else "#44aa44"
-        width = (remaining / 5) * 100
-        
-        st.markdown(f"""
-        <div style='text-align: center; margin: 20px 0;'>
-        <div style='background: #eee; border-radius: 10px; height: 20px; margin: 10px auto; width: 300px; max-width: 90%;'>
-        <div style='background: {color}; height: 100%; border-radius: 10px; width: {width}%; transition: width 0.1s;'></div>
-        </div>
-        <h3 style='color: {color}; font-size: 1.8em; margin: 10px 0;'>⏰ {remaining:.1f}초</h3>
-        </div>
-        """, unsafe_allow_html=True)
+        # 0.1초 단위로 양자화해 같은 남은 시간이면 같은 조각 사용
+        st.markdown(html_fragments.timer_bar(round(remaining * 10), game.time_limit), unsafe_allow_html=True)
         return True
     return False
 
+@instrumented("display_client_timer")
+def display_client_timer(question_idx, remaining, time_limit):
+    """브라우저 측 카운트다운 타이머 (마감 시각을 한 번만 전송)"""
+    # 남은 시간(ms)만 보내고 브라우저가 자체 시계로 마감 시각을 계산 → 서버/클라이언트 시계 오차 무관
+    # 마감되면 제출 버튼을 눌러 한 번만 재실행하고, 최종 판정은 check_answer()가 서버 시간으로 수행
+    remaining_ms = int(remaining * 1000)
+    # 서버 스케줄러가 먼저 마감을 처리하므로 브라우저 자동 제출은 늦춰서 예비용으로만 사용
+    expire_delay_ms = 1000 if USE_DEADLINE_SCHEDULER else 0
+    embed_html(f"""
+    <div style='text-align: center; margin: 10px 0; font-family: sans-serif;'>
+    <div style='background: #eee; border-radius: 10px; height: 20px; margin: 10px auto; width: 300px; max-width: 90%;'>
+    <div id='bar' style='background: #44aa44; height: 100%; border-radius: 10px; width: 100%;'></div>
+    </div>
+    <h3 id='label' style='color: #44aa44; font-size: 1.8em; margin: 10px 0;'></h3>
+    </div>
+    <script>
+    // 문제 {question_idx + 1}
+    const shownAt = performance.now();
+    const deadline = shownAt + {remaining_ms};
+    const bar = document.getElementById('bar');
+    const label = document.getElementById('label');
+    let fired = false;
+
+    function expire() {{
+        if (fired) return;
+        fired = true;
+        try {{
+            const buttons = window.parent.document.querySelectorAll('[data-testid="stFormSubmitButton"] button');
+            if (buttons.length > 0) {{
+                buttons[buttons.length - 1].click();
+            }}
+        }} catch (e) {{
+            console.log('Timer auto-submit failed', e);
+        }}
+    }}
+
+    // 제출(Enter 또는 버튼) 직전에 화면에 문제가 보인 뒤 지난 시간을 숨김 필드에 기록
+    const parentDoc = window.parent.document;
+    function stampClientTime(event) {{
+        const target = event.target;
+        if (!target.closest) return;
+        if (event.type === 'keydown' && (event.key !== 'Enter' || !target.closest('.st-key-answer_input_{question_idx}'))) return;
+        if (event.type === 'click' && !target.closest('[data-testid="stFormSubmitButton"]')) return;
+        const field = parentDoc.querySelector('.st-key-client_ms_{question_idx} input');
+        if (!field) return;
+        const setValue = Object.getOwnPropertyDescriptor(window.parent.HTMLInputElement.prototype, 'value').set;
+        setValue.call(field, String(Math.round(performance.now() - shownAt)));
+        field.dispatchEvent(new Event('input', {{ bubbles: true }}));
+    }}
+    parentDoc.addEventListener('keydown', stampClientTime, true);
+    parentDoc.addEventListener('click', stampClientTime, true);
+    window.addEventListener('pagehide', function() {{
+        parentDoc.removeEventListener('keydown', stampClientTime, true);
+        parentDoc.removeEventListener('click', stampClientTime, true);
+    }});
+
+    function tick() {{
+        const remaining = Math.max(0, (deadline - performance.now()) / 1000);
+        const color = remaining <= 1 ? '#ff4444' : remaining <= 2 ? '#ff8800' : '#44aa44';
+        bar.style.width = (remaining / {time_limit} * 100) + '%';
+        bar.style.background = color;
+        label.style.color = color;
+        label.textContent = '⏰ ' + remaining.toFixed(1) + '초';
+        if (remaining > 0) {{
+            requestAnimationFrame(tick);
+        }} else {{
+            setTimeout(expire, {expire_delay_ms});
+        }}
+    }}
+    tick();
+    </script>
+    """, height=90)
+
+def submit_answer(question_idx):
+    """제출 버튼 콜백: 스크립트 실행 전에 채점하므로 제출 한 번에 전체 실행 한 번
+
+    마감 스케줄러가 먼저 시간 초과로 넘긴 뒤 도착한 제출은 다음 문제에 적용하지 않고 버립니다.
+    """
+    game = st.session_state.game
+    if game is not None:
+        check_answer(game=game, question_idx=question_idx)
+
+@instrumented("display_answer_input")
 def display_answer_input():
     """개선된 답안 입력 인터페이스"""
+    question_idx = st.session_state.game.current_question
     col1, col2, col3 = st.columns([1, 2, 1])
     with col2:
         # 폼을 사용하여 Enter 키 지원 (clear_on_submit 제거)
-        with st.form(key=f"answer_form_{st.session_state.current_question}"):
-            user_input = st.text_input(
+        with st.form(key=f"answer_form_{question_idx}"):
+            # 숫자 입력칸: 숫자가 아닌 입력은 브라우저에서 막히고 모바일에서는 숫자 키패드가 뜸
+            st.number_input(
                 "답:",
-                key="answer_input",
+                min_value=0,
+                max_value=999,
+                value=None,
+                step=1,
+                key=answer_input_key(st.session_state.game),
                 placeholder="숫자 입력 후 Enter",
                 label_visibility="collapsed"
             )
             
-            submit_button = st.form_submit_button(
+            # 제출 순간 브라우저가 응답 시간(ms)을 채워 넣는 숨김 필드 (static/styles.css에서 숨김)
+            st.text_input(
+                "응답 시간",
+                key=client_time_key(st.session_state.game),
+                label_visibility="collapsed"
+            )
+            
+            # 채점은 콜백에서 끝나므로 제출이 일으킨 실행이 바로 다음 문제를 그림 (st.rerun() 불필요)
+            st.form_submit_button(
                 "📱 제출", 
                 type="primary", 
-                use_container_width=True
+                use_container_width=True,
+                on_click=submit_answer,
+                args=(question_idx,)
             )
-            
-            # 폼 제출 시 답안 확인
-            if submit_button:
-                check_answer()
-                st.rerun()
-        
-        # 강화된 자동 포커스 적용
-        st.markdown("""
-        <script>
-        setTimeout(function() {
-            const inputs = document.querySelectorAll('input[type="text"]');
-            if (inputs.length > 0) {
-                const input = inputs[inputs.length - 1];
-                input.focus();
-                input.select();
-                
-                // 강제로 여러 번 포커스 시도
-                for (let i = 0; i < 5; i++) {
-                    setTimeout(() => {
-                        input.focus();
-                        input.select();
-                    }, i * 100);
-                }
-            }
-        }, 50);
-        </script>
-        """, unsafe_allow_html=True)
 
+@st.fragment(run_every=0.1 if TIMER_MODE == "server" else None)
+@instrumented("display_question_fragment")
+def display_question_fragment(question_idx):
+    """문제 + 타이머 (이 영역만 독립적으로 재실행)"""
+    # 서버 타이머 모드에서는 이 프래그먼트만 0.1초마다 재실행되고,
+    # 문제가 바뀔 때만 페이지 전체(진행률, 점수, 결과)를 다시 그림
+    game = st.session_state.game
+    if game is None or game.game_finished or game.current_question != question_idx:
+        rerun("question_changed")
+
+    # 프래그먼트만 다시 실행된 경우 (전체 실행 안에서 호출된 경우는 main에서 기록)
+    ctx = get_script_run_ctx()
+    if ctx is not None and getattr(ctx, "fragment_ids_this_run", None):
+        record_run("fragment")
+
+    if not display_question_with_timer():
+        # 시간 초과 처리 (그 사이 마감 스케줄러가 먼저 넘겼으면 아무것도 하지 않음)
+        check_answer(game=game, question_idx=question_idx)
+        rerun("timeout")
+
+def display_question(question_idx):
+    """문제와 입력칸
+
+    입력 폼은 프래그먼트 밖에 두어 제출이 프래그먼트 실행 + 전체 실행이 아니라 전체 실행 한 번이 되게 함
+    """
+    display_question_fragment(question_idx)
+    display_answer_input()
+
+@instrumented("display_result_and_next")
 def display_result_and_next():
     """결과 표시와 동시에 다음 문제 + 입력칸 표시"""
-    current_idx = st.session_state.current_question
+    game = st.session_state.game
     
     # 이전 문제 결과 표시
-    if "정답" in st.session_state.last_result:
-        st.success(f"🎉 {st.session_state.last_result}")
-    else:
-        st.error(f"😅 {st.session_state.last_result}")
+    display_last_result(game)
     
-    # 다음 문제가 있는 경우
-    if current_idx < 10:
-        st.markdown("<div style='margin: 20px 0; border-top: 2px dashed #ccc;'></div>", unsafe_allow_html=True)
-        
-        # 현재 문제 표시 + 입력칸 (결과 표시와 동시에)
-        if display_question_with_timer():
-            display_answer_input()
-            # 타이머 업데이트
-            time.sleep(0.1)
-            st.rerun()
-        else:
-            # 시간 초과 처리
-            check_answer()
-            st.rerun()
-    else:
-        # 모든 문제 완료
-        time.sleep(1)
-        st.session_state.game_finished = True
-        st.rerun()
+    st.markdown("<div style='margin: 20px 0; border-top: 2px dashed #ccc;'></div>", unsafe_allow_html=True)
+    
+    # 현재 문제 표시 + 입력칸 (결과 표시와 동시에)
+    display_question(game.current_question)
 
+@instrumented("display_final_results")
 def display_final_results():
     """최종 결과 화면 표시"""
-    percentage = (st.session_state.score / 10) * 100
+    game = st.session_state.game
+    percentage = (game.score / len(game)) * 100
     
     # 성과에 따른 이모지와 메시지
     if percentage >= 90:
@@ -303,212 +968,139 @@ def display_final_results():
         grade = "연습필요"
         message = "다시 도전해보세요!"
     
+    # 맞춤 모드 문제는 코드로 다시 만들 수 없어 코드가 없음
+    quiz_label = f"🔑 퀴즈 코드: {game.quiz_code}" if game.quiz_code else "🧠 맞춤 문제"
+    
     st.markdown(f"""
     <div style='text-align: center; padding: 40px; background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); border-radius: 20px; margin: 20px 0; color: white; box-shadow: 0 8px 16px rgba(0,0,0,0.2);'>
     <h1 style='font-size: 3em; margin: 10px 0;'>{emoji}</h1>
     <h2>🎯 최종 결과</h2>
     <h1 style='font-size: 3.5em; margin: 20px 0; text-shadow: 2px 2px 4px rgba(0,0,0,0.3);'>{percentage:.0f}%</h1>
-    <p style='font-size: 24px; margin: 10px 0;'>10문제 중 {st.session_state.score}개 정답!</p>
+    <p style='font-size: 24px; margin: 10px 0;'>{len(game)}문제 중 {game.score}개 정답!</p>
     <p style='font-size: 18px; opacity: 0.9;'>{grade} 등급 - {message}</p>
+    <p style='font-size: 14px; opacity: 0.8;'>{quiz_label}</p>
     </div>
     """, unsafe_allow_html=True)
 
+@instrumented("display_detailed_results")
 def display_detailed_results():
-    """상세 결과 표시"""
+    """상세 결과 표시 (문제 수와 무관하게 표 하나만 전송, 긴 퀴즈는 표 안에서 스크롤)"""
     with st.expander("📊 상세 결과 보기", expanded=False):
         st.markdown("### 문제별 결과")
         
-        for i in range(10):
-            question = st.session_state.questions[i]
-            correct = st.session_state.answers[i]
-            user = st.session_state.user_answers[i]
-            
-            if user is None:
-                status_color = "#ff4444"
-                status = "❌ 시간 초과"
-                user_display = "시간 초과"
-            elif user == correct:
-                status_color = "#44aa44"
-                status = "✅ 정답"
-                user_display = str(user)
-            else:
-                status_color = "#ff4444"
-                status = "❌ 오답"
-                user_display = str(user)
-            
-            st.markdown(f"""
-            <div style='padding: 10px; margin: 5px 0; border-left: 4px solid {status_color}; background: #f8f9fa; border-radius: 5px;'>
-            <strong>{i+1}.</strong> {question} = {correct} | 
-            <strong>입력:</strong> {user_display} | 
-            <span style='color: {status_color};'><strong>{status}</strong></span>
-            </div>
-            """, unsafe_allow_html=True)
+        game = st.session_state.game
+        count = len(game)
+        # 열별 리스트로 한 번에 만들어 st.dataframe 하나로 전송 (화면에 보이는 행만 그려짐)
+        st.dataframe(
+            {
+                "번호": range(1, count + 1),
+                # 문제 문자열은 저장하지 않고 표시할 때만 생성
+                "문제": [f"{game.question_text(i)} = {game.answers[i]}" for i in range(count)],
+                "입력": [
+                    "시간 초과" if game.outcomes[i] == OUTCOME_TIMEOUT
+                    else "-" if game.user_answer(i) is None else str(game.user_answer(i))
+                    for i in range(count)
+                ],
+                "시간 (초)": [round(game.response_ms(i) / 1000, 2) for i in range(count)],
+                "결과": [OUTCOME_LABELS[outcome] for outcome in game.outcomes],
+            },
+            hide_index=True,
+            use_container_width=True,
+            # 10문제까지는 스크롤 없이, 그보다 길면 높이를 고정
+            height=min(count, 10) * 35 + 38,
+        )
 
-def setup_mobile_styles():
-    """모바일 최적화 CSS 설정"""
-    st.markdown("""
-    <style>
-    /* 전체 앱 스타일 */
-    .stApp {
-        max-width: 100%;
-        padding: 10px;
-    }
-    
-    /* 입력 필드 최적화 */
-    .stTextInput input {
-        font-size: 24px !important;
-        text-align: center !important;
-        height: 60px !important;
-        border: 2px solid #1f77b4 !important;
-        border-radius: 10px !important;
-        box-shadow: 0 2px 4px rgba(0,0,0,0.1) !important;
-    }
-    
-    .stTextInput input:focus {
-        border-color: #0d5aa7 !important;
-        box-shadow: 0 0 0 2px rgba(31, 119, 180, 0.25) !important;
-    }
-    
-    /* 버튼 최적화 */
-    .stButton button {
-        font-size: 20px !important;
-        height: 60px !important;
-        border-radius: 10px !important;
-        font-weight: bold !important;
-        box-shadow: 0 4px 8px rgba(0,0,0,0.1) !important;
-        transition: all 0.2s !important;
-    }
-    
-    .stButton button:hover {
-        transform: translateY(-2px) !important;
-        box-shadow: 0 6px 12px rgba(0,0,0,0.15) !important;
-    }
-    
-    /* 폼 제출 버튼 */
-    .stFormSubmitButton button {
-        font-size: 20px !important;
-        height: 60px !important;
-        background: linear-gradient(135deg, #1f77b4 0%, #0d5aa7 100%) !important;
-        border: none !important;
-        border-radius: 10px !important;
-        color: white !important;
-        font-weight: bold !important;
-        box-shadow: 0 4px 8px rgba(0,0,0,0.2) !important;
-    }
-    
-    /* 진행률 바 */
-    .stProgress > div > div {
-        background: linear-gradient(90deg, #1f77b4 0%, #44aa44 100%) !important;
-        border-radius: 10px !important;
-    }
+@instrumented("display_leaderboard")
+def display_leaderboard(game):
+    """모드/문제 수/제한 시간별 순위표와 내 순위 표시"""
+    from leaderboard import board_key
+    boards = get_leaderboards()
+    key = board_key(game)
+    mode_name = f"{MODE_NAMES[game.mode]} {len(game)}문제·{game.time_limit:g}초"
     
-    /* 모바일 최적화 */
-    @media (max-width: 768px) {
-        .stTextInput input {
-            font-size: 28px !important;
-            height: 70px !important;
-        }
-        .stButton button, .stFormSubmitButton button {
-            font-size: 22px !important;
-            height: 70px !important;
-        }
-    }
-    
-    /* 숨겨진 라벨 */
-    .stTextInput label {
-        display: none !important;
-    }
-    </style>
+    st.markdown(f"""
+    <div style='text-align: center; margin: 10px 0;'>
+    <span style='background: #e8f4f8; padding: 8px 16px; border-radius: 20px; font-weight: bold; color: #1f77b4;'>
+    🏅 {mode_name} 모드 순위: {boards.rank(game)}위 / {boards.size(key)}명
+    </span>
+    </div>
     """, unsafe_allow_html=True)
-
-def auto_focus_script():
-    """강화된 자동 포커스 JavaScript"""
-    st.markdown("""
-    <script>
-    function focusInputAggressively() {
-        // 여러 번 시도하여 확실히 포커스
-        let attempts = 0;
-        const maxAttempts = 10;
-        
-        function tryFocus() {
-            const inputs = document.querySelectorAll('input[type="text"]');
-            if (inputs.length > 0) {
-                const input = inputs[inputs.length - 1];
-                input.focus();
-                input.select();
-                
-                // 포커스가 제대로 되었는지 확인
-                if (document.activeElement === input) {
-                    console.log('Input focused successfully');
-                    return true;
-                }
-            }
-            
-            attempts++;
-            if (attempts < maxAttempts) {
-                setTimeout(tryFocus, 50);
-            }
-            return false;
-        }
-        
-        tryFocus();
-    }
-    
-    // 즉시 실행
-    focusInputAggressively();
     
-    // DOM 변경 감지하여 다시 포커스
-    const observer = new MutationObserver(function(mutations) {
-        let shouldFocus = false;
-        mutations.forEach(function(mutation) {
-            if (mutation.type === 'childList') {
-                mutation.addedNodes.forEach(function(node) {
-                    if (node.nodeType === 1) { // Element node
-                        const inputs = node.querySelectorAll ? node.querySelectorAll('input[type="text"]') : [];
-                        if (inputs.length > 0 || (node.tagName === 'INPUT' && node.type === 'text')) {
-                            shouldFocus = true;
-                        }
-                    }
-                });
-            }
-        });
-        
-        if (shouldFocus) {
-            setTimeout(focusInputAggressively, 10);
-        }
-    });
-    
-    observer.observe(document.body, {
-        childList: true,
-        subtree: true
-    });
-    
-    // 페이지 클릭 시에도 포커스 유지
-    document.addEventListener('click', function(e) {
-        if (e.target.tagName !== 'INPUT') {
-            setTimeout(focusInputAggressively, 10);
-        }
-    });
-    </script>
-    """, unsafe_allow_html=True)
+    with st.expander(f"🏆 {mode_name} 모드 TOP 10", expanded=False):
+        rows = [
+            f"| {rank} | {score}/{len(game)} | {total_ms / 1000:.2f}초 | {label or '-'} |"
+            for rank, score, total_ms, label in boards.top(key, 10)
+        ]
+        st.markdown("| 순위 | 점수 | 총 시간 | 퀴즈 코드 |\n| --- | --- | --- | --- |\n" + "\n".join(rows))
+
+@instrumented("display_player_stats")
+def display_player_stats():
+    """유형별 누적 정답률과 평균 응답 시간 (맞춤 모드 출제 기준)"""
+    stats = get_player_stats()
+    if stats is None:
+        return
+    with st.expander("🧠 유형별 기록", expanded=False):
+        rows = [
+            f"| {name} | {attempts} | {accuracy * 100:.0f}% | {avg_ms / 1000:.2f}초 |"
+            for name, attempts, accuracy, avg_ms in stats.class_summary()
+            if attempts
+        ]
+        st.markdown("| 유형 | 문제 수 | 정답률 | 평균 시간 |\n| --- | --- | --- | --- |\n" + "\n".join(rows))
+
+@st.cache_resource
+def static_asset_loader():
+    """CSS/JS 내용을 JS 문자열로 넣은 로더 HTML (파일은 프로세스에서 한 번만 읽음)"""
+    import json
 
+    def js_string(name):
+        with open(os.path.join(STATIC_DIR, name), encoding="utf-8") as f:
+            # 내용 안의 "</script>"가 로더의 script 태그를 닫지 않도록
+            return json.dumps(f.read(), ensure_ascii=False).replace("</", "<\\/")
+
+    return STATIC_ASSET_LOADER % (js_string("styles.css"), js_string("autofocus.js"))
+
+@instrumented("setup_mobile_styles")
+def setup_mobile_styles():
+    """모바일 최적화 CSS + 자동 포커스 스크립트 로드 (세션의 첫 실행에서만 호출)"""
+    # 로더가 부모 문서 head에 넣은 style/script는 iframe이 사라진 뒤에도 남아 있으므로
+    # 재실행마다 로더를 다시 보낼 필요가 없음
+    embed_html(static_asset_loader())
+
+@instrumented("main")
 def main():
-    # 페이지 설정
+    # 페이지 설정 (이모지 아이콘은 프로세스 첫 실행에서 Streamlit 이모지 목록 로드에 ~100ms가 들어
+    # ASCII인 Material 아이콘 사용)
     st.set_page_config(
         page_title="두 자리 수 연산 퀴즈", 
-        page_icon="🧮",
+        page_icon=":material/calculate:",
         layout="centered",
         initial_sidebar_state="collapsed"
     )
     
-    setup_mobile_styles()
-    init_session_state()
-    auto_focus_script()
+    first_run = init_session_state()
+    start_metrics_exporters()
+    if first_run:
+        setup_mobile_styles()
+    sync_session_state()
+    record_run("full")
     
     st.title("🧮 두 자리 수 연산 퀴즈")
+
+    # 경주 중이면 방의 문제 진행에 맞춤 (방 알림이 올 때만 재실행되므로 폴링 없음)
+    race = sync_race()
+    game = st.session_state.game
+    
+    # 시간 초과는 서버 스케줄러가 처리하므로 타이머 폴링이 필요 없음
+    # (경주에서 다음 문제를 기다리는 동안은 방이 시작 시각을 정할 때까지 예약하지 않음)
+    if not race_waiting(game, race):
+        arm_question_deadline()
+    
+    # 경주 대기실
+    if race is not None and (game is None or game.quiz_code != race.code):
+        display_race_lobby(race)
     
     # 게임 시작 전 화면
-    if not st.session_state.game_started:
+    elif game is None:
         display_game_rules()
         
         st.markdown("<br>", unsafe_allow_html=True)
@@ -516,72 +1108,77 @@ def main():
         col1, col2, col3 = st.columns([1, 2, 1])
         with col2:
             if st.button("🎮 게임 시작!", type="primary", use_container_width=True):
-                start_game()
+                start_game(st.session_state.quiz_code_input)
+        
+        display_race_entry()
+        display_worksheet_export()
     
     # 게임 진행 중
-    elif st.session_state.game_started and not st.session_state.game_finished:
-        current_idx = st.session_state.current_question
+    elif not game.game_finished:
+        current_idx = game.current_question
         
         # 진행률 표시
-        progress = (current_idx + 1) / 10
-        st.progress(progress, text=f"진행률: {current_idx + 1}/10 문제")
+        progress = (current_idx + 1) / len(game)
+        st.progress(progress, text=f"진행률: {current_idx + 1}/{len(game)} 문제")
         
         # 현재 점수 표시
-        st.markdown(f"""
-        <div style='text-align: center; margin: 10px 0;'>
-        <span style='background: #e8f4f8; padding: 8px 16px; border-radius: 20px; font-weight: bold; color: #1f77b4;'>
-        현재 점수: {st.session_state.score}/{current_idx + (1 if st.session_state.show_result else 0)}
-        </span>
-        </div>
-        """, unsafe_allow_html=True)
+        st.markdown(html_fragments.score_badge(game.score, current_idx + (1 if game.show_result else 0)),
+                    unsafe_allow_html=True)
+        
+        # 경주에서 답을 내고 다음 문제를 기다리는 중
+        if race_waiting(game, race):
+            display_race_waiting(game, race)
         
         # 결과 표시 중인 경우 (이전 문제 결과 + 현재 문제 입력)
-        if st.session_state.show_result:
+        elif game.show_result:
             display_result_and_next()
         
-        # 첫 문제 또는 순수 답안 입력 상태
+        # 첫 문제 또는 순수 답안 입력 상태 (시간 체크는 프래그먼트에서)
         else:
-            # 시간 체크
-            elapsed = time.time() - st.session_state.question_start_time
-            if elapsed > 5.0:
-                # 시간 초과 자동 처리
-                check_answer()
-                st.rerun()
-            else:
-                # 문제와 타이머 표시
-                if display_question_with_timer():
-                    display_answer_input()
-                    # 타이머 업데이트를 위한 자동 새로고침
-                    time.sleep(0.1)
-                    st.rerun()
+            display_question(current_idx)
     
     # 게임 완료 화면
-    elif st.session_state.game_finished:
+    else:
         st.markdown("## 🎉 게임 완료!")
+        save_game_result(game)
         
         # 마지막 문제 결과 표시 (아직 표시되지 않은 경우)
-        if st.session_state.last_result and st.session_state.show_result:
-            if "정답" in st.session_state.last_result:
-                st.success(f"🎉 {st.session_state.last_result}")
-            else:
-                st.error(f"😅 {st.session_state.last_result}")
+        if game.show_result:
+            display_last_result(game)
         
         st.markdown("<br>", unsafe_allow_html=True)
         
         # 최종 결과 표시
         display_final_results()
         
+        # 경주 순위 (경주가 끝날 때까지는 프래그먼트로 갱신해 풍선, 순위표, 상세 결과는 다시 그리지 않음)
+        if race is not None:
+            from race_room import ROOM_FINISHED
+            if race.state == ROOM_FINISHED:
+                display_race_standings(race)
+            else:
+                display_race_final_standings(race.code)
+        
+        # 순위표 표시
+        display_leaderboard(game)
+        
         # 상세 결과 표시
         display_detailed_results()
         
+        # 맞춤 모드 출제 기준이 되는 유형별 기록
+        display_player_stats()
+        
         # 액션 버튼들
         col1, col2 = st.columns(2)
         with col1:
             if st.button("🔄 다시 하기", type="primary", use_container_width=True):
-                reset_game()
+                reset_game(game.quiz_code)
         with col2:
             if st.button("🏠 처음으로", type="secondary", use_container_width=True):
                 reset_game()
+    
+    # 끝까지 실행된 경우만 기록 (st.rerun()으로 중단된 실행은 제외)
+    SCRIPT_TIMINGS.record_run(time.perf_counter() - _SCRIPT_START, first_run)
 
 if __name__ == "__main__":
     main()
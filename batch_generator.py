@@ -0,0 +1,127 @@
+from collections import namedtuple
+
+import numpy as np
+
+from problem_bank import BANK, MODE_OPERATORS, OPERATORS
+
+OPERATOR_CODES = {operator: code for code, operator in enumerate(OPERATORS)}
+
+# 연산자 코드별 문제 은행 배열 (복사 없이 공유하는 읽기 전용 numpy 뷰)
+BANK_ARRAYS = tuple(
+    tuple(np.frombuffer(values, dtype=values.format)
+          for values in (BANK[operator].left, BANK[operator].right, BANK[operator].answers))
+    for operator in OPERATORS
+)
+
+# N개 퀴즈 × K문제 배열 묶음 (모두 shape (N, K))
+QuizBatch = namedtuple('QuizBatch', ['left', 'right', 'operators', 'answers'])
+
+CSV_HEADER = b"quiz,question,left,operator,right,answer\n"
+
+
+def generate_batch(n_quizzes, n_questions=10, mode="random", rng=None, seed=None):
+    """N개 퀴즈 × K문제를 한 번에 생성 (problem_bank.draw()와 같은 규칙)
+
+    연산자를 고른 뒤 그 연산자의 문제 은행에서 인덱스를 균등하게 뽑으므로 앱의 퀴즈와 같은 분포입니다.
+    """
+    if rng is None:
+        rng = np.random.default_rng(seed)
+    shape = (n_quizzes, n_questions)
+
+    codes = [OPERATOR_CODES[operator] for operator in MODE_OPERATORS[mode]]
+    if len(codes) == 1:
+        operators = np.full(shape, codes[0], dtype=np.uint8)
+    else:
+        operators = rng.choice(np.array(codes, dtype=np.uint8), size=shape)
+
+    left = np.empty(shape, dtype=np.int16)
+    right = np.empty(shape, dtype=np.int16)
+    answers = np.empty(shape, dtype=np.int16)
+    for code in codes:
+        mask = operators == code
+        bank_left, bank_right, bank_answers = BANK_ARRAYS[code]
+        indices = rng.integers(len(bank_answers), size=int(mask.sum()))
+        left[mask] = bank_left[indices]
+        right[mask] = bank_right[indices]
+        answers[mask] = bank_answers[indices]
+
+    return QuizBatch(left, right, operators, answers)
+
+
+def iter_batches(n_quizzes, n_questions=10, mode="random", seed=None, chunk_quizzes=10000):
+    """(시작 퀴즈 번호, QuizBatch)를 chunk_quizzes개씩 생성 → 메모리 사용량 일정"""
+    rng = np.random.default_rng(seed)
+    for start in range(0, n_quizzes, chunk_quizzes):
+        count = min(chunk_quizzes, n_quizzes - start)
+        yield start, generate_batch(count, n_questions, mode, rng=rng)
+
+
+def _digits(values):
+    """정수 배열 → 오른쪽 정렬된 ASCII 숫자 행렬 (앞자리는 공백)"""
+    values = np.asarray(values, dtype=np.int64).reshape(-1)
+    width = len(str(int(values.max()))) if values.size else 1
+    powers = 10 ** np.arange(width - 1, -1, -1, dtype=np.int64)
+    digits = (values[:, None] // powers) % 10 + ord('0')
+    # 선행 0은 공백으로 바꾸고 나중에 한꺼번에 제거 (마지막 자리는 항상 유지)
+    leading = values[:, None] < powers
+    leading[:, -1] = False
+    return np.where(leading, ord(' '), digits).astype(np.uint8)
+
+
+def _render_rows(columns, n_rows):
+    """bytes 리터럴과 정수/문자 배열을 이어 붙여 행 단위 바이트열 생성
+
+    문자열을 행마다 만들지 않고 고정 폭 바이트 행렬을 만든 뒤 패딩 공백만 제거하므로,
+    리터럴에는 공백이 없어야 합니다.
+    """
+    parts = []
+    for column in columns:
+        if isinstance(column, bytes):
+            literal = np.frombuffer(column, dtype=np.uint8)
+            parts.append(np.broadcast_to(literal, (n_rows, literal.size)))
+        elif column.dtype == np.uint8 and column.ndim == 2:
+            parts.append(column)
+        else:
+            parts.append(_digits(column))
+    matrix = np.concatenate(parts, axis=1).reshape(-1)
+    return matrix[matrix != ord(' ')].tobytes()
+
+
+def _row_columns(start, batch):
+    """(퀴즈 번호, 문제 번호, 왼쪽, 연산자 문자, 오른쪽, 정답) 평탄화 배열"""
+    n_quizzes, n_questions = batch.answers.shape
+    quiz = np.repeat(np.arange(start + 1, start + n_quizzes + 1), n_questions)
+    question = np.tile(np.arange(1, n_questions + 1), n_quizzes)
+    symbols = np.frombuffer(''.join(OPERATORS).encode(), dtype=np.uint8)
+    operator_chars = symbols[batch.operators.reshape(-1)][:, None]
+    return quiz, question, batch.left, operator_chars, batch.right, batch.answers
+
+
+def render_csv(start, batch):
+    """QuizBatch → CSV 바이트열 (헤더 제외)"""
+    quiz, question, left, operator, right, answer = _row_columns(start, batch)
+    columns = [quiz, b",", question, b",", left, b",", operator, b",", right, b",", answer, b"\n"]
+    return _render_rows(columns, quiz.size)
+
+
+def render_jsonl(start, batch):
+    """QuizBatch → JSON Lines 바이트열"""
+    quiz, question, left, operator, right, answer = _row_columns(start, batch)
+    columns = [
+        b'{"quiz":', quiz, b',"question":', question, b',"left":', left,
+        b',"operator":"', operator, b'","right":', right, b',"answer":', answer, b"}\n",
+    ]
+    return _render_rows(columns, quiz.size)
+
+
+def write_csv(fp, n_quizzes, n_questions=10, mode="random", seed=None, chunk_quizzes=10000):
+    """퀴즈를 청크 단위로 생성하며 바이너리 파일 fp에 CSV로 스트리밍"""
+    fp.write(CSV_HEADER)
+    for start, batch in iter_batches(n_quizzes, n_questions, mode, seed, chunk_quizzes):
+        fp.write(render_csv(start, batch))
+
+
+def write_jsonl(fp, n_quizzes, n_questions=10, mode="random", seed=None, chunk_quizzes=10000):
+    """퀴즈를 청크 단위로 생성하며 바이너리 파일 fp에 JSON Lines로 스트리밍"""
+    for start, batch in iter_batches(n_quizzes, n_questions, mode, seed, chunk_quizzes):
+        fp.write(render_jsonl(start, batch))
@@ -0,0 +1,60 @@
+"""배치 생성 vs 기존 generate_all_questions() 루프 비교
+
+사용법: python benchmarks/bench_batch.py [퀴즈 수]
+"""
+import csv
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import batch_generator
+import problem_bank
+
+
+def loop_generate(n_quizzes, mode):
+    """app.generate_all_questions()와 같은 방식 (퀴즈마다 문제 10개를 하나씩)"""
+    quizzes = []
+    for _ in range(n_quizzes):
+        questions = []
+        answers = []
+        for operator, index in problem_bank.draw(mode, 10):
+            problems = problem_bank.BANK[operator]
+            questions.append(problems.text(index))
+            answers.append(problems.answers[index])
+        quizzes.append((questions, answers))
+    return quizzes
+
+
+def loop_write_csv(fp, quizzes):
+    writer = csv.writer(fp)
+    writer.writerow(["quiz", "question", "problem", "answer"])
+    for quiz_no, (questions, answers) in enumerate(quizzes, 1):
+        for question_no, (question, answer) in enumerate(zip(questions, answers), 1):
+            writer.writerow([quiz_no, question_no, question, answer])
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    n_quizzes = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    print(f"퀴즈 {n_quizzes}개 × 10문제")
+
+    generate_loop = timed(loop_generate, n_quizzes, "random")
+    generate_batch = timed(batch_generator.generate_batch, n_quizzes, 10, "random", None, 0)
+    print(f"생성      루프 {generate_loop:8.3f}s   배치 {generate_batch:8.3f}s   ({generate_loop / generate_batch:.0f}배)")
+
+    quizzes = loop_generate(n_quizzes, "random")
+    write_loop = timed(loop_write_csv, io.StringIO(), quizzes) + generate_loop
+    write_batch = timed(batch_generator.write_csv, io.BytesIO(), n_quizzes, 10, "random", 0)
+    print(f"생성+CSV  루프 {write_loop:8.3f}s   배치 {write_batch:8.3f}s   ({write_loop / write_batch:.0f}배)")
+
+
+if __name__ == "__main__":
+    main()
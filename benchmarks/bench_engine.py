@@ -0,0 +1,48 @@
+"""Streamlit 없이 엔진만으로 초당 처리 가능한 답안 수 측정
+
+사용법: python benchmarks/bench_engine.py [게임 수]
+가짜 시계를 주입해 실제로 기다리지 않고 응답 지연과 시간 초과를 흉내 냅니다.
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from engine import QuizEngine
+
+
+class FakeClock:
+    """호출할 때마다 현재 값(ns)을 돌려주는 수동 시계"""
+
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+def main():
+    n_games = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    clock = FakeClock()
+    engine = QuizEngine(clock=clock)
+    rng = random.Random(0)
+    # 응답 지연 0.5~6초 (5초 초과는 시간 초과), 10%는 오답
+    delays = [int(rng.uniform(0.5, 6.0) * 1_000_000_000) for _ in range(1000)]
+
+    answered = 0
+    start = time.perf_counter()
+    for i in range(n_games):
+        game = engine.new_game("random")
+        while not game.game_finished:
+            clock.now += delays[answered % 1000]
+            answer = game.answers[game.current_question]
+            engine.submit(game, str(answer if answered % 10 else answer + 1))
+            answered += 1
+    elapsed = time.perf_counter() - start
+    print(f"게임 {n_games}개, 답안 {answered}개: {elapsed:.2f}s ({answered / elapsed:,.0f} 답안/초)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""교실 경주 허브의 알림 묶음 효과 측정 (Streamlit 없이 허브만)
+
+사용법: python benchmarks/bench_race.py [--players 200] [--questions 5] [--tick 0.2]
+
+플레이어마다 스레드 하나가 실제 check_answer()처럼 QuizEngine으로 채점한 뒤 허브에 보고합니다.
+알림 콜백은 세션 재실행 요청 대신 횟수만 셉니다.
+
+출력: 보고 수 대비 방송 수, 플레이어당 문제당 알림 수, 문제 시작 알림 지연 백분위
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from engine import QuizEngine
+from leaderboard import total_time_ms
+from race_room import EVENT_FINISHED, EVENT_QUESTION, RaceHub
+
+
+class Player:
+    """알림을 받으면 새 문제를 풀고 보고하는 가짜 참가자"""
+
+    def __init__(self, hub, engine, player_id):
+        self.hub = hub
+        self.engine = engine
+        self.player_id = player_id
+        self.events = threading.Condition()
+        self.pending = []
+        self.notifications = 0
+        self.start_delays = []
+        self.game = None
+
+    def notify(self, kind, snapshot):
+        with self.events:
+            self.notifications += 1
+            if kind in (EVENT_QUESTION, EVENT_FINISHED):
+                self.pending.append((kind, snapshot, time.monotonic_ns()))
+                self.events.notify()
+
+    def run(self, rng):
+        while True:
+            with self.events:
+                while not self.pending:
+                    self.events.wait()
+                kind, race, received = self.pending.pop(0)
+            if kind == EVENT_FINISHED:
+                return
+            self.start_delays.append((received - race.question_started_ns) / 1_000_000)
+            if self.game is None:
+                draws = self.engine.draw_questions(race.mode, race.code, count=race.count)
+                self.game = self.engine.new_game(race.mode, race.code, draws, time_limit=race.time_limit)
+            game = self.game
+            # app.sync_race()처럼 놓친 문제는 시간 초과로 처리
+            while game.current_question < race.question:
+                self.engine.submit(game, None, timed_out=True)
+            game.question_start_time = race.question_started_ns
+            # 대부분 제한 시간의 10~60% 안에 답하고, 약 5%는 답하지 않음
+            if rng.random() < 0.05:
+                continue
+            time.sleep(race.time_limit * rng.uniform(0.1, 0.6))
+            answer = game.answers[game.current_question]
+            self.engine.submit(game, str(answer if rng.random() < 0.9 else answer + 1))
+            answered = len(game) if game.game_finished else game.current_question
+            self.hub.report(race.code, self.player_id, answered, game.score, total_time_ms(game))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--players", type=int, default=200)
+    parser.add_argument("--questions", type=int, default=5)
+    parser.add_argument("--time-limit", type=float, default=2.0)
+    parser.add_argument("--tick", type=float, default=0.2)
+    args = parser.parse_args()
+
+    hub = RaceHub(tick=args.tick, break_seconds=0.5, grace=0.2)
+    engine = QuizEngine()
+    players = [Player(hub, engine, f"p{i}") for i in range(args.players)]
+    code = hub.create_room("random", args.questions, args.time_limit, "p0", "p0", players[0].notify)
+    for player in players[1:]:
+        hub.join(code, player.player_id, player.player_id, player.notify)
+
+    threads = [
+        threading.Thread(target=player.run, args=(random.Random(i),), daemon=True)
+        for i, player in enumerate(players)
+    ]
+    for thread in threads:
+        thread.start()
+    start = time.perf_counter()
+    hub.start(code, "p0")
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    stats = hub.stats()
+    delays = sorted(delay for player in players for delay in player.start_delays)
+    notifications = sum(player.notifications for player in players)
+    per_question = notifications / args.players / args.questions
+    print(f"플레이어 {args.players}명 × {args.questions}문제, {elapsed:.1f}초 (방 코드 {code})")
+    print(f"답안 보고     : {stats['reports']}")
+    print(f"방송          : {stats['broadcasts']} (보고 {stats['reports'] / max(stats['broadcasts'], 1):.0f}개당 1회)")
+    print(f"알림          : {notifications} (플레이어당 문제당 {per_question:.1f}회)")
+    print(f"문제 시작 지연: p50 {statistics.median(delays):.2f}ms, "
+          f"p99 {delays[int(len(delays) * 0.99) - 1]:.2f}ms, 최대 {delays[-1]:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
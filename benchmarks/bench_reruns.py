@@ -0,0 +1,98 @@
+"""문제당 스크립트 실행 횟수와 전송 바이트 비교 (이전 전체 재실행 루프 vs 프래그먼트)
+
+사용법: python benchmarks/bench_reruns.py [답안 입력까지 걸리는 초]
+
+AppTest로 게임 화면을 한 번 그려서 ForwardMsg 크기를 측정한 뒤,
+문제 하나를 푸는 동안의 비용을 모드별로 계산합니다.
+- 이전: 0.1초마다 main() 전체 재실행
+- 프래그먼트 (QUIZ_TIMER_MODE=server): 0.1초마다 문제/타이머 프래그먼트만 재실행
+- 클라이언트 타이머 (기본값): 제출 시 전체 1회 (채점은 제출 버튼 콜백에서)
+
+마지막으로 10문제를 실제로 풀면서 계측 카운터(quiz_reruns_total)로 답안당 실행 수를 셉니다.
+"""
+import os
+import sys
+
+os.environ.setdefault("QUIZ_INSTRUMENT", "1")
+os.environ.setdefault("QUIZ_RESULTS_DB", "")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from metrics import INSTRUMENTATION
+from streamlit.runtime.forward_msg_queue import ForwardMsgQueue
+from streamlit.testing.v1 import AppTest
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app.py")
+TICK = 0.1
+
+_sizes = []
+_original_enqueue = ForwardMsgQueue.enqueue
+
+
+def _recording_enqueue(self, msg):
+    if msg.HasField("delta"):
+        _sizes.append((msg.ByteSize(), bool(msg.delta.fragment_id)))
+    return _original_enqueue(self, msg)
+
+
+ForwardMsgQueue.enqueue = _recording_enqueue
+
+
+def measure_in_game_run(timer_mode):
+    """두 번째 문제 화면(결과 배너 포함) 한 번 그릴 때의 (전체 바이트, 프래그먼트 바이트)"""
+    # AppTest는 실행마다 app.py를 다시 실행하므로 환경 변수 변경이 바로 반영됨
+    os.environ["QUIZ_TIMER_MODE"] = timer_mode
+    at = AppTest.from_file(APP_PATH, default_timeout=10)
+    at.run()
+    at.button[0].click().run()
+    at.number_input[0].set_value(0)
+    at.button[0].click()
+    del _sizes[:]
+    at.run()
+    total = sum(size for size, _ in _sizes)
+    fragment = sum(size for size, in_fragment in _sizes if in_fragment)
+    return total, fragment
+
+
+def _count(name):
+    return sum(INSTRUMENTATION._counters.get(name, {}).values())
+
+
+def measure_runs_per_answer():
+    """클라이언트 타이머로 한 게임을 끝까지 풀 때 답안 하나당 (스크립트 실행 수, st.rerun() 호출 수)"""
+    os.environ["QUIZ_TIMER_MODE"] = "client"
+    at = AppTest.from_file(APP_PATH, default_timeout=10)
+    at.run()
+    at.button[0].click().run()
+    runs, reruns = _count("quiz_reruns_total"), _count("quiz_st_rerun_total")
+    answered = 0
+    while not at.session_state.game.game_finished:
+        game = at.session_state.game
+        at.number_input(key=f"answer_input_{game.current_question}").set_value(game.answers[game.current_question])
+        next(button for button in at.button if button.label == "📱 제출").click().run()
+        answered += 1
+    return ((_count("quiz_reruns_total") - runs) / answered,
+            (_count("quiz_st_rerun_total") - reruns) / answered)
+
+
+def main():
+    answer_delay = float(sys.argv[1]) if len(sys.argv) > 1 else 2.5
+    ticks = int(answer_delay / TICK)
+    total, fragment = measure_in_game_run("server")
+    client_total, _ = measure_in_game_run("client")
+
+    rows = [
+        ("이전 (전체 재실행 루프)", ticks, 0, ticks * total),
+        ("프래그먼트 (server 타이머)", 1, ticks, total + ticks * fragment),
+        ("클라이언트 타이머", 1, 0, client_total),
+    ]
+    print(f"답안 입력까지 {answer_delay}초")
+    print(f"{'모드':<28}{'전체 실행':>10}{'프래그먼트':>12}{'전송 바이트':>14}")
+    for name, full_runs, fragment_runs, sent in rows:
+        print(f"{name:<28}{full_runs:>10}{fragment_runs:>12}{sent:>14}")
+
+    runs, reruns = measure_runs_per_answer()
+    print(f"답안당 스크립트 실행 {runs:.1f}회 (st.rerun() {reruns:.1f}회)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""세션당 게임 상태 메모리 비교 (이전: 세션 키 + 문자열/리스트, 현재: GameState)
+
+사용법: python benchmarks/bench_session_state.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import problem_bank
+from game_state import GameState, OUTCOME_CORRECT
+
+
+def deep_sizeof(obj, seen=None):
+    """컨테이너 안의 객체까지 포함한 크기 (공유 객체는 한 번만)"""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple)):
+        size += sum(deep_sizeof(item, seen) for item in obj)
+    return size
+
+
+def legacy_state(draws):
+    """이전 init_session_state()/start_game() 구조로 끝난 게임 하나"""
+    questions = []
+    answers = []
+    for operator, index in draws:
+        problems = problem_bank.BANK[operator]
+        questions.append(problems.text(index))
+        answers.append(problems.answers[index])
+    return {
+        'game_started': True,
+        'current_question': 9,
+        'score': 10,
+        'questions': questions,
+        'answers': answers,
+        'user_answers': list(answers),
+        'question_start_time': time.time(),
+        'game_finished': True,
+        'show_result': True,
+        'last_result': "✅ 정답입니다!",
+        'operation_mode': "random",
+        'quiz_code': problem_bank.new_quiz_code(),
+    }
+
+
+def compact_state(draws):
+    game = GameState(draws, problem_bank.new_quiz_code(), "random")
+    game.question_start_time = time.time()
+    for i in range(len(game)):
+        game.record(i, game.answers[i], OUTCOME_CORRECT, 1_234_000_000, 1200)
+    game.current_question = len(game) - 1
+    game.game_finished = True
+    return game
+
+
+def main():
+    draws = problem_bank.draw("random", 10)
+    legacy = deep_sizeof(legacy_state(draws))
+    compact = compact_state(draws).nbytes()
+    print(f"이전 세션 상태: {legacy:6d} B")
+    print(f"GameState    : {compact:6d} B ({legacy / compact:.1f}배 작음)")
+
+
+if __name__ == "__main__":
+    main()
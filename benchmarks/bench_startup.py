@@ -0,0 +1,138 @@
+"""콜드 스타트와 첫 화면 비용 측정
+
+사용법: python benchmarks/bench_startup.py [--repeat 5] [--server]
+
+매번 새 프로세스에서 측정합니다.
+- import: streamlit import 시간과 그 뒤 app.py가 import하는 모듈 시간
+- 첫 실행: 새 프로세스에서 시작 화면 스크립트 첫 실행 시간과 전송 바이트 (AppTest)
+- 재실행: 같은 세션에서 시작 화면을 다시 그리는 시간과 전송 바이트
+  (AppTest의 대기 시간을 빼기 위해 스크립트 시간은 app.py가 기록한 metrics 값을 사용)
+- --server: `streamlit run`이 /_stcore/health에 응답할 때까지 걸린 시간
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+APP_PATH = os.path.join(ROOT, "app.py")
+
+IMPORT_PROBE = """
+import json, sys, time
+sys.path.insert(0, sys.argv[1])
+start = time.perf_counter()
+import streamlit, streamlit.components.v1
+mid = time.perf_counter()
+import app
+end = time.perf_counter()
+print(json.dumps({"streamlit_ms": (mid - start) * 1000, "app_ms": (end - mid) * 1000,
+                  "modules": sorted(m for m in ("adaptive", "analytics", "leaderboard", "result_store",
+                                                "deadline_scheduler", "state_backend", "race_room", "sqlite3")
+                                    if m in sys.modules)}))
+"""
+
+RUN_PROBE = """
+import json, sys, time
+from streamlit.runtime.forward_msg_queue import ForwardMsgQueue
+from streamlit.testing.v1 import AppTest
+
+sizes = []
+original = ForwardMsgQueue.enqueue
+def recording(self, msg):
+    if msg.HasField("delta"):
+        sizes.append(msg.ByteSize())
+    return original(self, msg)
+ForwardMsgQueue.enqueue = recording
+
+at = AppTest.from_file(sys.argv[1], default_timeout=30)
+start = time.perf_counter()
+at.run()
+first_ms = (time.perf_counter() - start) * 1000
+first_bytes = sum(sizes)
+
+for _ in range(20):
+    del sizes[:]
+    at.run()
+
+from metrics import SCRIPT_TIMINGS
+timings = SCRIPT_TIMINGS.snapshot()
+print(json.dumps({"first_ms": first_ms, "first_bytes": first_bytes,
+                  "script_first_ms": timings["first_run_ms"], "import_ms": timings["import_ms"],
+                  "rerun_ms": timings["rerun_avg_ms"], "rerun_bytes": sum(sizes)}))
+"""
+
+
+def probe(code, *args):
+    """새 파이썬 프로세스에서 code를 실행해 마지막 줄의 JSON 결과를 반환"""
+    out = subprocess.run(
+        [sys.executable, "-c", code, *args],
+        capture_output=True, text=True, check=True, cwd=ROOT,
+        env={**os.environ, "QUIZ_RESULTS_DB": "", "PYTHONDONTWRITEBYTECODE": "0"},
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def server_ready_ms(timeout=60):
+    """streamlit run 시작부터 health 체크 응답까지 (ms)"""
+    port = free_port()
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", APP_PATH, "--server.headless", "true",
+         "--server.port", str(port), "--browser.gatherUsageStats", "false"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, cwd=ROOT,
+        env={**os.environ, "QUIZ_RESULTS_DB": ""},
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1) as resp:
+                    if resp.status == 200:
+                        return (time.perf_counter() - start) * 1000
+            except OSError:
+                time.sleep(0.02)
+        return None
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def median_of(results, key):
+    return statistics.median(result[key] for result in results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--server", action="store_true", help="streamlit run 기동 시간도 측정")
+    args = parser.parse_args()
+
+    imports = [probe(IMPORT_PROBE, ROOT) for _ in range(args.repeat)]
+    runs = [probe(RUN_PROBE, APP_PATH) for _ in range(args.repeat)]
+
+    print(f"새 프로세스 {args.repeat}회 측정 (중앙값)")
+    print(f"import streamlit  : {median_of(imports, 'streamlit_ms'):.1f}ms")
+    print(f"import app        : {median_of(imports, 'app_ms'):.1f}ms "
+          f"(미리 로드된 모듈: {', '.join(imports[-1]['modules']) or '없음'})")
+    print(f"첫 실행 (시작 화면): AppTest {median_of(runs, 'first_ms'):.1f}ms, "
+          f"스크립트 {median_of(runs, 'script_first_ms'):.1f}ms (import {median_of(runs, 'import_ms'):.1f}ms), "
+          f"{median_of(runs, 'first_bytes'):.0f}바이트")
+    print(f"재실행 (시작 화면) : 스크립트 {median_of(runs, 'rerun_ms'):.2f}ms, {median_of(runs, 'rerun_bytes'):.0f}바이트")
+    if args.server:
+        ready = [server_ready_ms() for _ in range(args.repeat)]
+        ready = [value for value in ready if value is not None]
+        print(f"서버 기동 (health): {statistics.median(ready):.0f}ms" if ready else "서버 기동 실패")
+
+
+if __name__ == "__main__":
+    main()
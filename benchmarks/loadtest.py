@@ -0,0 +1,233 @@
+"""여러 플레이어를 한 프로세스 안에서 동시에 돌리는 부하 테스트
+
+사용법: python benchmarks/loadtest.py [--players 200] [--games 1] [--tick 0]
+
+플레이어마다 Streamlit AppTest 세션을 하나씩 만들어 실제 app.py를 실행합니다.
+AppTest는 동시에 여러 개를 실행할 수 없어 재실행은 잠금으로 한 번에 하나씩 처리되며,
+재실행 지연에는 이 대기 시간이 포함됩니다 (GIL 때문에 실제 서버도 CPU는 한 코어만 씀).
+--tick 0.1을 주면 예전 서버 타이머처럼 0.1초마다 재실행하는 부하를 흉내 냅니다.
+
+출력: 초당 재실행 수, 재실행 지연 백분위, 세션당 CPU/메모리,
+      시간 초과 문제의 마감 대비 처리 지연(타이머 오차)
+
+세션당 RSS는 대부분 AppTest 자체(스크립트 실행기, 요소 트리, 스레드)의 비용이므로, 시작 화면만 같은
+횟수로 다시 실행한 빈 세션의 RSS를 먼저 재서 뺀 값과 앱이 세션에 남기는 상태의 크기(pickle)를 따로 출력합니다.
+"""
+import argparse
+import os
+import pickle
+import random
+import resource
+import sys
+import threading
+import time
+
+from streamlit.testing.v1 import AppTest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from game_state import OUTCOME_TIMEOUT
+
+# app.py의 기본 문제 수 (빈 세션 기준값의 실행 수를 맞추는 데 사용)
+QUESTION_COUNT = int(os.environ.get("QUIZ_QUESTION_COUNT", "10"))
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app.py")
+
+
+# AppTest 실행은 전역 상태를 건드리므로 한 번에 하나씩
+_run_lock = threading.Lock()
+
+
+class Stats:
+    """스레드 간 공유 측정값"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.run_latencies = []
+        self.timer_drift_ms = []
+        self.answered = 0
+        self.timeouts = 0
+        self.errors = 0
+        # 끝난 세션 (메모리를 잴 때까지 해제되지 않도록 보관)과 세션 상태 크기 (바이트)
+        self.sessions = []
+        self.state_bytes = []
+
+    def add_run(self, latency):
+        with self.lock:
+            self.run_latencies.append(latency)
+
+
+def timed_run(at, stats, widget=None):
+    """재실행 한 번 (widget이 있으면 그 위젯 동작으로 재실행)"""
+    start = time.perf_counter()
+    with _run_lock:
+        (widget or at).run()
+    stats.add_run(time.perf_counter() - start)
+    if at.exception:
+        with stats.lock:
+            stats.errors += 1
+        raise RuntimeError(at.exception[0].message)
+
+
+def answer_delay(rng):
+    """현실적인 응답 지연 (초): 대부분 1~4초, 약 10%는 5초 초과"""
+    if rng.random() < 0.1:
+        return rng.uniform(5.2, 6.5)
+    return min(4.8, rng.lognormvariate(0.7, 0.4))
+
+
+def play(player_id, games, tick, stats):
+    """플레이어 한 명: 게임 시작 → 문제마다 생각하고 답 제출 → 결과 화면"""
+    rng = random.Random(player_id)
+    at = AppTest.from_file(APP_PATH, default_timeout=60)
+    timed_run(at, stats)
+
+    for _ in range(games):
+        timed_run(at, stats, at.button[0].click())
+        game = at.session_state.game
+        while not game.game_finished:
+            question_idx = game.current_question
+            wait_until = time.monotonic() + answer_delay(rng)
+            # tick > 0이면 대기하는 동안 주기적으로 재실행 (서버 타이머 폴링 흉내)
+            while tick and time.monotonic() + tick < wait_until:
+                time.sleep(tick)
+                timed_run(at, stats)
+            time.sleep(max(0.0, wait_until - time.monotonic()))
+
+            if game.current_question != question_idx or game.game_finished:
+                # 마감 스케줄러가 이미 시간 초과 처리 → 화면만 갱신
+                timed_run(at, stats)
+            else:
+                answer = game.answers[question_idx]
+                if rng.random() < 0.2:
+                    answer += 1
+                at.number_input(key=f"answer_input_{question_idx}").set_value(answer)
+                timed_run(at, stats, at.button[0].click())
+
+        with stats.lock:
+            for i in range(len(game)):
+                stats.answered += 1
+                if game.outcomes[i] == OUTCOME_TIMEOUT:
+                    stats.timeouts += 1
+                    stats.timer_drift_ms.append((game.response_ns[i] - game.time_limit_ns) / 1_000_000)
+
+        # 결과 화면의 "처음으로" 버튼
+        timed_run(at, stats, at.button[1].click())
+
+    with stats.lock:
+        stats.sessions.append(at)
+        stats.state_bytes.append(session_state_bytes(at))
+
+
+def session_state_bytes(at):
+    """앱이 세션 상태에 남긴 값의 pickle 크기 (메모리 상태 저장소는 같은 게임 객체를 공유하므로 따로 세지 않음)"""
+    return len(pickle.dumps(dict(at.session_state._state.filtered_state)))
+
+
+def warm_up():
+    """게임 하나를 바로바로 답해 끝냄 (게임/결과 화면이 처음 import하는 모듈이 측정값에 섞이지 않도록)"""
+    stats = Stats()
+    at = AppTest.from_file(APP_PATH, default_timeout=60)
+    timed_run(at, stats)
+    timed_run(at, stats, at.button[0].click())
+    game = at.session_state.game
+    while not game.game_finished:
+        at.number_input(key=f"answer_input_{game.current_question}").set_value(game.answers[game.current_question])
+        timed_run(at, stats, at.button[0].click())
+    timed_run(at, stats, at.button[1].click())
+
+
+def idle_sessions(count, runs):
+    """시작 화면만 runs번 다시 실행한 빈 세션 count개 (AppTest 자체의 세션당 메모리 기준값)
+
+    플레이어와 같게 세션마다 스레드 하나에서 비슷한 횟수만큼 실행해 스레드별 할당 영역과 재실행 비용도 포함
+    """
+    stats = Stats()
+
+    def idle(sessions):
+        at = AppTest.from_file(APP_PATH, default_timeout=60)
+        for _ in range(runs):
+            timed_run(at, stats)
+        sessions.append(at)
+
+    sessions = []
+    threads = [threading.Thread(target=idle, args=(sessions,), daemon=True) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sessions
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def rss_kb():
+    """현재 RSS (KB)"""
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * resource.getpagesize() // 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--players", type=int, default=200)
+    parser.add_argument("--games", type=int, default=1)
+    parser.add_argument("--tick", type=float, default=0.0, help="대기 중 재실행 주기 (초), 0이면 제출 때만")
+    parser.add_argument("--ramp", type=float, default=5.0, help="플레이어 접속을 나누어 시작할 시간 (초)")
+    parser.add_argument("--idle", type=int, default=20, help="기준값을 잴 빈 세션 수")
+    args = parser.parse_args()
+
+    # import와 캐시 리소스 생성이 기준값에 섞이지 않도록 게임 하나를 끝낸 뒤 빈 세션 측정.
+    # 빈 세션은 플레이어 한 명의 실행 수(시작, 문제마다 한 번, 결과, 처음으로)만큼 다시 실행
+    warm_up()
+    idle_runs = args.games * (QUESTION_COUNT + 2) + 1
+    rss_start = rss_kb()
+    idle = idle_sessions(args.idle, idle_runs)
+    idle_kb = (rss_kb() - rss_start) / args.idle if args.idle else 0.0
+
+    stats = Stats()
+    rss_before = rss_kb()
+    cpu_before = time.process_time()
+    start = time.perf_counter()
+
+    threads = []
+    for player_id in range(args.players):
+        thread = threading.Thread(target=play, args=(player_id, args.games, args.tick, stats), daemon=True)
+        thread.start()
+        threads.append(thread)
+        time.sleep(args.ramp / args.players)
+    for thread in threads:
+        thread.join()
+
+    wall = time.perf_counter() - start
+    cpu = time.process_time() - cpu_before
+    rss_after = rss_kb()
+    # 빈 세션은 측정이 끝날 때까지 살려 두어 그 메모리가 플레이어 세션에 재사용되지 않게 함
+    del idle
+    runs = stats.run_latencies
+
+    print(f"플레이어 {args.players}명 × 게임 {args.games}회, tick={args.tick}s, {wall:.1f}초")
+    print(f"재실행          : {len(runs)}회, {len(runs) / wall:.1f}회/초, 오류 {stats.errors}회")
+    print("재실행 지연 (ms): " + ", ".join(
+        f"p{pct} {percentile(runs, pct) * 1000:.1f}" for pct in (50, 90, 99)
+    ) + f", 최대 {max(runs, default=0) * 1000:.1f}")
+    print(f"CPU             : 전체 {cpu:.1f}s, 세션당 {cpu / args.players * 1000:.0f}ms")
+    per_session_kb = (rss_after - rss_before) / args.players
+    state = stats.state_bytes
+    print(f"메모리 (RSS)    : 증가 {(rss_after - rss_before) / 1024:.1f}MB, "
+          f"세션당 {per_session_kb:.0f}KB (AppTest 포함)")
+    print(f"  빈 세션 기준  : 시작 화면만 {idle_runs}번 실행한 AppTest 세션당 {idle_kb:.0f}KB "
+          f"→ 게임 세션은 {per_session_kb - idle_kb:.0f}KB 더 씀 (게임/결과 화면 요소 트리 포함)")
+    print(f"  앱 세션 상태  : 앱이 세션에 남긴 값 평균 {sum(state) / max(1, len(state)):.0f}B, "
+          f"최대 {max(state, default=0)}B (pickle)")
+    drift = stats.timer_drift_ms
+    print(f"타이머 오차 (ms): 시간 초과 {stats.timeouts}/{stats.answered}문제, "
+          f"p50 {percentile(drift, 50):.0f}, p99 {percentile(drift, 99):.0f}, 최대 {max(drift, default=0):.0f}")
+
+
+if __name__ == "__main__":
+    main()
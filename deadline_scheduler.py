@@ -0,0 +1,118 @@
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class DeadlineScheduler:
+    """세션별 문제 마감 시각을 힙으로 관리하는 프로세스 공용 스케줄러
+
+    세션당 항목은 최대 하나이며, 다시 예약하면 이전 항목은 무효가 됩니다.
+    대기 중인 세션이 없으면 백그라운드 스레드는 조건 변수에서 잠들어 있으므로
+    유휴 세션은 비용이 들지 않습니다.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self._heap = []
+        self._entries = {}
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._fired = 0
+        self._last_lag = 0.0
+        self._max_lag = 0.0
+        self._total_lag = 0.0
+        self._thread = threading.Thread(target=self._run, name="deadline-scheduler", daemon=True)
+        self._thread.start()
+
+    def schedule(self, key, deadline, callback, token=None):
+        """key의 마감 시각(clock 기준)을 예약. 같은 token이 이미 예약되어 있으면 무시"""
+        with self._cond:
+            entry = self._entries.get(key)
+            if entry is not None and token is not None and entry[2] == token:
+                return
+            seq = next(self._seq)
+            self._entries[key] = (deadline, seq, token, callback)
+            heapq.heappush(self._heap, (deadline, seq, key))
+            # 가장 이른 마감이 바뀐 경우에만 스레드를 깨움
+            if self._heap[0][1] == seq:
+                self._cond.notify()
+
+    def cancel(self, key):
+        """key의 예약 취소 (힙 항목은 꺼낼 때 버려짐)"""
+        with self._cond:
+            self._entries.pop(key, None)
+
+    def stats(self):
+        """큐 깊이와 발화 지연(초) 통계"""
+        with self._cond:
+            return {
+                'queue_depth': len(self._entries),
+                'heap_size': len(self._heap),
+                'fired': self._fired,
+                'last_lag': self._last_lag,
+                'max_lag': self._max_lag,
+                'avg_lag': self._total_lag / self._fired if self._fired else 0.0,
+            }
+
+    def prometheus_lines(self):
+        """metrics.Instrumentation.to_prometheus()에 덧붙이는 큐 깊이와 발화 지연"""
+        stats = self.stats()
+        return [
+            "# HELP quiz_deadline_queue_depth 마감을 기다리는 세션 수",
+            "# TYPE quiz_deadline_queue_depth gauge",
+            f"quiz_deadline_queue_depth {stats['queue_depth']}",
+            "# HELP quiz_deadline_heap_size 취소/재예약으로 남은 항목을 포함한 힙 크기",
+            "# TYPE quiz_deadline_heap_size gauge",
+            f"quiz_deadline_heap_size {stats['heap_size']}",
+            "# HELP quiz_deadline_fired_total 처리한 마감 수",
+            "# TYPE quiz_deadline_fired_total counter",
+            f"quiz_deadline_fired_total {stats['fired']}",
+            "# HELP quiz_deadline_lag_seconds 마감 시각부터 콜백 호출까지의 지연",
+            "# TYPE quiz_deadline_lag_seconds gauge",
+            f'quiz_deadline_lag_seconds{{stat="last"}} {stats["last_lag"]:.6f}',
+            f'quiz_deadline_lag_seconds{{stat="max"}} {stats["max_lag"]:.6f}',
+            f'quiz_deadline_lag_seconds{{stat="avg"}} {stats["avg_lag"]:.6f}',
+        ]
+
+    def _pop_due(self):
+        """마감된 유효 항목을 하나 꺼냄 (조건 변수 잠금 상태에서 호출)"""
+        while True:
+            # 취소되었거나 재예약으로 밀려난 항목 정리
+            while self._heap:
+                deadline, seq, key = self._heap[0]
+                entry = self._entries.get(key)
+                if entry is not None and entry[1] == seq:
+                    break
+                heapq.heappop(self._heap)
+
+            if not self._heap:
+                self._cond.wait()
+                continue
+
+            deadline, seq, key = self._heap[0]
+            wait = deadline - self._clock()
+            if wait > 0:
+                self._cond.wait(wait)
+                continue
+
+            heapq.heappop(self._heap)
+            _, _, _, callback = self._entries.pop(key)
+            lag = max(0.0, self._clock() - deadline)
+            self._fired += 1
+            self._last_lag = lag
+            self._max_lag = max(self._max_lag, lag)
+            self._total_lag += lag
+            return callback
+
+    def _run(self):
+        while True:
+            with self._cond:
+                callback = self._pop_due()
+            try:
+                callback()
+            except Exception:
+                logger.exception("deadline callback failed")
@@ -0,0 +1,104 @@
+import time
+
+import problem_bank
+from game_state import (
+    GameState,
+    OUTCOME_CORRECT,
+    OUTCOME_INVALID,
+    OUTCOME_TIMEOUT,
+    OUTCOME_WRONG,
+)
+
+
+def parse_answer(text):
+    """입력값 → 정수 (정수는 그대로, 빈 입력은 None, 숫자가 아닌 문자열은 ValueError)"""
+    if isinstance(text, int):
+        return text
+    text = (text or "").strip()
+    return int(text) if text else None
+
+
+class QuizEngine:
+    """Streamlit과 무관한 게임 로직 (문제 생성, 채점, 시간 초과, 점수)
+
+    시간은 주입된 clock()으로만 읽으므로 가짜 시계로 부하 테스트나 재현이 가능합니다.
+    clock()은 단조 증가하는 나노초 정수를 돌려줘야 합니다 (기본값 time.monotonic_ns).
+    """
+
+    def __init__(self, clock=time.monotonic_ns, question_count=10, time_limit=5.0):
+        self.clock = clock
+        self.question_count = question_count
+        self.time_limit = time_limit
+        self.time_limit_ns = int(time_limit * 1_000_000_000)
+
+    def draw_questions(self, mode, quiz_code=None, stats=None, count=None):
+        """문제 은행에서 (연산자, 인덱스) 목록 추출 (count가 없으면 기본 문제 수)
+
+        퀴즈 코드가 있으면 코드로 결정되고, 없이 맞춤 모드면 stats(PlayerStats) 가중치로 뽑습니다.
+        """
+        count = count or self.question_count
+        if quiz_code:
+            rng = problem_bank.quiz_rng(quiz_code, mode)
+        else:
+            rng = problem_bank.random
+            if mode == "adaptive" and stats is not None:
+                return tuple(stats.draw(count, rng))
+        return tuple(problem_bank.draw(mode, count, rng))
+
+    def new_game(self, mode="random", quiz_code=None, draws=None, time_limit=None):
+        """새 게임을 만들고 첫 문제 타이머 시작 (time_limit: 문제당 초, 없으면 기본값)"""
+        if draws is None:
+            draws = self.draw_questions(mode, quiz_code)
+        time_limit_ns = int(time_limit * 1_000_000_000) if time_limit else self.time_limit_ns
+        game = GameState(draws, quiz_code, mode, time_limit_ns)
+        game.question_start_time = self.clock()
+        return game
+
+    def elapsed_ns(self, game):
+        """현재 문제를 보여준 뒤 지난 시간 (ns)"""
+        return self.clock() - game.question_start_time
+
+    def elapsed(self, game):
+        """현재 문제를 보여준 뒤 지난 시간 (초)"""
+        return self.elapsed_ns(game) / 1_000_000_000
+
+    def remaining(self, game):
+        """현재 문제의 남은 시간 (초)"""
+        return max(0.0, game.time_limit - self.elapsed(game))
+
+    def deadline(self, game):
+        """현재 문제의 마감 시각 (clock 기준, ns)"""
+        return game.question_start_time + game.time_limit_ns
+
+    def submit(self, game, user_input, timed_out=False, client_ms=None):
+        """현재 문제에 답을 제출하고 다음 문제로 이동. 결과 코드 반환
+
+        client_ms는 브라우저가 잰 응답 시간으로 기록만 하며, 시간 초과 판정은 항상 서버 시계로 합니다.
+        """
+        current_idx = game.current_question
+        elapsed_ns = self.elapsed_ns(game)
+        # 브라우저 값은 서버가 관측한 시간보다 길 수 없음
+        if client_ms is not None:
+            client_ms = min(client_ms, elapsed_ns // 1_000_000)
+
+        if timed_out or elapsed_ns > game.time_limit_ns:
+            outcome = OUTCOME_TIMEOUT
+            user_answer = None
+        else:
+            try:
+                user_answer = parse_answer(user_input)
+                outcome = OUTCOME_CORRECT if user_answer == game.answers[current_idx] else OUTCOME_WRONG
+            except ValueError:
+                user_answer = None
+                outcome = OUTCOME_INVALID
+
+        game.record(current_idx, user_answer, outcome, elapsed_ns, client_ms)
+
+        # 다음 문제로 바로 이동 (결과 표시는 동시에)
+        if current_idx < len(game) - 1:
+            game.current_question += 1
+            game.question_start_time = self.clock()
+            game.show_result = True
+        else:
+            game.game_finished = True
+        return outcome
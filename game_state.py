@@ -0,0 +1,178 @@
+import struct
+import sys
+import time
+from array import array
+
+import problem_bank
+
+# 답이 없음(시간 초과, 잘못된 입력)을 나타내는 값 (입력값은 int32 범위로 제한)
+NO_ANSWER = -2 ** 31
+ANSWER_MAX = 2 ** 31 - 1
+
+# 브라우저 측 응답 시간이 없음을 나타내는 값
+NO_CLIENT_TIME = 2 ** 32 - 1
+
+# 문제당 기본 제한 시간 (ns)
+DEFAULT_TIME_LIMIT_NS = 5_000_000_000
+
+# 문제별 결과 코드
+OUTCOME_PENDING = 0
+OUTCOME_CORRECT = 1
+OUTCOME_WRONG = 2
+OUTCOME_TIMEOUT = 3
+OUTCOME_INVALID = 4
+
+# to_bytes() 머리말: 형식 버전, 문제 수, 현재 문제, 점수, 플래그, 직전 결과, 문제 시작 시각(벽시계 ns),
+#                    퀴즈 코드/모드 길이, 제한 시간(ms)
+_HEADER = struct.Struct('<BHHHBBqBBI')
+_FORMAT_VERSION = 2
+# to_bytes()가 이어 붙이는 배열 (이 순서대로, 같은 바이트 순서의 호스트끼리만 공유)
+_ARRAY_SLOTS = (
+    'operators', 'indices', 'left', 'right', 'answers',
+    'user_answers', 'outcomes', 'response_ns', 'client_response_ms',
+)
+
+
+class GameState:
+    """한 게임의 상태 (피연산자/정답/입력/응답 시간을 고정 크기 배열로 저장)
+
+    문제 문자열은 저장하지 않고 화면에 그릴 때 question_text()로 만듭니다.
+    """
+
+    __slots__ = (
+        'quiz_code', 'mode', 'time_limit_ns', 'operators', 'indices', 'left', 'right', 'answers',
+        'user_answers', 'outcomes', 'response_ns', 'client_response_ms',
+        'current_question', 'score', 'question_start_time',
+        'game_finished', 'show_result', 'last_outcome', 'result_saved',
+        # 상태 저장소가 객체별로 읽은 version을 기억할 수 있도록 (weakref)
+        '__weakref__',
+    )
+
+    def __init__(self, draws, quiz_code=None, mode="random", time_limit_ns=DEFAULT_TIME_LIMIT_NS):
+        """draws: problem_bank.draw()가 돌려준 (연산자, 인덱스) 목록"""
+        count = len(draws)
+        self.quiz_code = quiz_code
+        self.mode = mode
+        self.time_limit_ns = time_limit_ns
+        self.operators = array('B')
+        # 문제 은행 인덱스 (플레이어 통계에서 문제를 구분하는 데 사용)
+        self.indices = array('H')
+        self.left = array('B')
+        self.right = array('B')
+        self.answers = array('h')
+        for operator, index in draws:
+            left, right, answer = problem_bank.BANK[operator].problem(index)
+            self.operators.append(problem_bank.OPERATORS.index(operator))
+            self.indices.append(index)
+            self.left.append(left)
+            self.right.append(right)
+            self.answers.append(answer)
+
+        self.user_answers = array('i', [NO_ANSWER]) * count
+        self.outcomes = array('B', [OUTCOME_PENDING]) * count
+        # 서버 측 응답 시간 (monotonic_ns 기준)과 브라우저가 잰 응답 시간 (ms)
+        self.response_ns = array('Q', [0]) * count
+        self.client_response_ms = array('I', [NO_CLIENT_TIME]) * count
+
+        self.current_question = 0
+        self.score = 0
+        self.question_start_time = None
+        self.game_finished = False
+        self.show_result = False
+        self.last_outcome = OUTCOME_PENDING
+        self.result_saved = False
+
+    def __len__(self):
+        return len(self.answers)
+
+    @property
+    def time_limit(self):
+        """문제당 제한 시간 (초)"""
+        return self.time_limit_ns / 1_000_000_000
+
+    def question_text(self, index):
+        """화면 표시용 문제 문자열"""
+        operator = problem_bank.OPERATORS[self.operators[index]]
+        return f"{self.left[index]} {operator} {self.right[index]}"
+
+    def user_answer(self, index):
+        """입력한 답 (없으면 None)"""
+        value = self.user_answers[index]
+        return None if value == NO_ANSWER else value
+
+    def response_ms(self, index):
+        """응답 시간 (ms): 브라우저 측정값이 있으면 그 값, 없으면 서버 측정값"""
+        client_ms = self.client_response_ms[index]
+        if client_ms != NO_CLIENT_TIME:
+            return client_ms
+        return self.response_ns[index] / 1_000_000
+
+    def record(self, index, user_answer, outcome, response_ns, client_ms=None):
+        """문제 하나의 결과 기록"""
+        if user_answer is None:
+            self.user_answers[index] = NO_ANSWER
+        else:
+            self.user_answers[index] = min(max(user_answer, NO_ANSWER + 1), ANSWER_MAX)
+        self.outcomes[index] = outcome
+        self.response_ns[index] = max(0, int(response_ns))
+        if client_ms is not None:
+            self.client_response_ms[index] = min(max(0, int(client_ms)), NO_CLIENT_TIME - 1)
+        self.last_outcome = outcome
+        if outcome == OUTCOME_CORRECT:
+            self.score += 1
+
+    def last_answered(self):
+        """가장 최근에 답한 문제 인덱스"""
+        return len(self) - 1 if self.game_finished else self.current_question - 1
+
+    def to_bytes(self, clock=time.monotonic_ns):
+        """다른 프로세스/호스트로 옮길 수 있는 바이트열
+
+        문제 시작 시각은 프로세스마다 다른 단조 시계 대신 벽시계(ns)로 바꿔 저장합니다.
+        """
+        start_wall = time.time_ns() - (clock() - self.question_start_time)
+        flags = self.game_finished | self.show_result << 1 | self.result_saved << 2
+        quiz_code = (self.quiz_code or "").encode()
+        mode = self.mode.encode()
+        header = _HEADER.pack(
+            _FORMAT_VERSION, len(self), self.current_question, self.score,
+            flags, self.last_outcome, start_wall, len(quiz_code), len(mode),
+            self.time_limit_ns // 1_000_000,
+        )
+        return b''.join([header, quiz_code, mode] + [getattr(self, name).tobytes() for name in _ARRAY_SLOTS])
+
+    @classmethod
+    def from_bytes(cls, data, clock=time.monotonic_ns):
+        """to_bytes()의 역. 문제 시작 시각은 이 프로세스의 clock 기준으로 되돌림"""
+        # 형식마다 머리말 길이가 다르므로 버전부터 확인
+        if data[0] != _FORMAT_VERSION:
+            raise ValueError(f"지원하지 않는 게임 상태 형식: {data[0]}")
+        (_, count, current_question, score, flags, last_outcome,
+         start_wall, code_len, mode_len, time_limit_ms) = _HEADER.unpack_from(data)
+        pos = _HEADER.size
+        quiz_code = data[pos:pos + code_len].decode() or None
+        pos += code_len
+        mode = data[pos:pos + mode_len].decode()
+        pos += mode_len
+
+        game = cls((), quiz_code, mode, time_limit_ms * 1_000_000)
+        for name in _ARRAY_SLOTS:
+            values = getattr(game, name)
+            size = values.itemsize * count
+            values.frombytes(data[pos:pos + size])
+            pos += size
+        game.current_question = current_question
+        game.score = score
+        game.game_finished = bool(flags & 1)
+        game.show_result = bool(flags & 2)
+        game.result_saved = bool(flags & 4)
+        game.last_outcome = last_outcome
+        game.question_start_time = clock() - (time.time_ns() - start_wall)
+        return game
+
+    def nbytes(self):
+        """이 객체가 차지하는 대략적인 메모리 (바이트)"""
+        size = sys.getsizeof(self)
+        for name in self.__slots__:
+            size += sys.getsizeof(getattr(self, name))
+        return size
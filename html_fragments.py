@@ -0,0 +1,81 @@
+import os
+from functools import lru_cache
+
+from metrics import INSTRUMENTATION
+
+# 조각 종류별 LRU 최대 항목 수 (app.py는 실행마다 다시 실행되므로 캐시는 이 모듈에 두어
+# 재실행과 세션 사이에서 공유)
+FRAGMENT_CACHE_SIZE = int(os.environ.get("QUIZ_FRAGMENT_CACHE_SIZE", "4096"))
+
+
+@lru_cache(maxsize=FRAGMENT_CACHE_SIZE)
+def question_header(index, count, text):
+    """문제 번호와 문제 (같은 문제는 모든 세션이 같은 문자열을 재사용)"""
+    return f"""
+    <div style='text-align: center; padding: 20px 0;'>
+    <h2>문제 {index + 1}/{count}</h2>
+    <h1 style='font-size: 4em; color: #1f77b4; margin: 20px 0; text-shadow: 2px 2px 4px rgba(0,0,0,0.1);'>{text} = ?</h1>
+    </div>
+    """
+
+
+@lru_cache(maxsize=FRAGMENT_CACHE_SIZE)
+def timer_bar(tenths, time_limit):
+    """서버 타이머 모드의 남은 시간 막대 (남은 시간은 0.1초 단위로 양자화한 값)"""
+    remaining = tenths / 10
+    color = "#ff4444" if remaining <= 1 else "#ff8800" if remaining <= 2 else "#44aa44"
+    width = (remaining / time_limit) * 100
+    return f"""
+        <div style='text-align: center; margin: 20px 0;'>
+        <div style='background: #eee; border-radius: 10px; height: 20px; margin: 10px auto; width: 300px; max-width: 90%;'>
+        <div style='background: {color}; height: 100%; border-radius: 10px; width: {width}%; transition: width 0.1s;'></div>
+        </div>
+        <h3 style='color: {color}; font-size: 1.8em; margin: 10px 0;'>⏰ {remaining:.1f}초</h3>
+        </div>
+        """
+
+
+@lru_cache(maxsize=FRAGMENT_CACHE_SIZE)
+def score_badge(score, answered):
+    """진행 중 현재 점수 배지"""
+    return f"""
+        <div style='text-align: center; margin: 10px 0;'>
+        <span style='background: #e8f4f8; padding: 8px 16px; border-radius: 20px; font-weight: bold; color: #1f77b4;'>
+        현재 점수: {score}/{answered}
+        </span>
+        </div>
+        """
+
+
+FRAGMENTS = {
+    "question_header": question_header,
+    "timer_bar": timer_bar,
+    "score_badge": score_badge,
+}
+
+
+def cache_stats():
+    """조각별 (적중, 누락, 현재 크기, 최대 크기) (LRU 크기를 정할 때 참고)"""
+    return {name: func.cache_info() for name, func in FRAGMENTS.items()}
+
+
+def clear_caches():
+    for func in FRAGMENTS.values():
+        func.cache_clear()
+
+
+def prometheus_lines():
+    """metrics.Instrumentation.to_prometheus()에 덧붙이는 적중/누락 카운터와 크기"""
+    stats = cache_stats()
+    lines = ["# HELP quiz_fragment_cache_total HTML 조각 캐시 조회 수",
+             "# TYPE quiz_fragment_cache_total counter"]
+    for name, info in stats.items():
+        lines.append(f'quiz_fragment_cache_total{{fragment="{name}",result="hit"}} {info.hits}')
+        lines.append(f'quiz_fragment_cache_total{{fragment="{name}",result="miss"}} {info.misses}')
+    lines += ["# HELP quiz_fragment_cache_size HTML 조각 캐시 항목 수", "# TYPE quiz_fragment_cache_size gauge"]
+    for name, info in stats.items():
+        lines.append(f'quiz_fragment_cache_size{{fragment="{name}"}} {info.currsize}')
+    return lines
+
+
+INSTRUMENTATION.add_collector(prometheus_lines)
@@ -0,0 +1,104 @@
+import threading
+from bisect import bisect_left, insort
+
+
+def total_time_ms(game):
+    """게임 전체 응답 시간 (ms, 서버 측정값 기준)"""
+    return sum(game.response_ns) // 1_000_000
+
+
+def board_key(game):
+    """게임이 속하는 순위표 키 (모드, 문제 수, 제한 시간 ms)"""
+    return (game.mode, len(game), game.time_limit_ns // 1_000_000)
+
+
+class Leaderboard:
+    """점수 내림차순, 총 시간 오름차순으로 정렬 상태를 유지하는 순위표
+
+    항목은 (-점수, 총 시간 ms, 순번, 표시 이름) 튜플로 정렬된 리스트에 bisect로 삽입하므로
+    다시 정렬하지 않으며, 순위 조회는 O(log n)입니다. capacity를 넘으면 꼴찌부터 버립니다.
+    """
+
+    def __init__(self, capacity=100000):
+        self.capacity = capacity
+        self._entries = []
+        self._seq = 0
+        self._total = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def total(self):
+        """지금까지 추가된 게임 수 (버려진 항목 포함)"""
+        return self._total
+
+    def add(self, score, total_ms, label):
+        """게임 추가. 추가 직후의 순위(1부터) 반환"""
+        self._seq += 1
+        self._total += 1
+        entry = (-score, total_ms, self._seq, label)
+        insort(self._entries, entry)
+        if len(self._entries) > self.capacity:
+            self._entries.pop()
+        return self.rank(score, total_ms)
+
+    def rank(self, score, total_ms):
+        """해당 점수/시간의 순위 (같은 기록은 같은 순위, 1부터)"""
+        return bisect_left(self._entries, (-score, total_ms)) + 1
+
+    def top(self, n=10):
+        """상위 n개의 (순위, 점수, 총 시간 ms, 표시 이름)"""
+        return [
+            (i + 1, -neg_score, total_ms, label)
+            for i, (neg_score, total_ms, _, label) in enumerate(self._entries[:n])
+        ]
+
+
+class Leaderboards:
+    """(모드, 문제 수, 제한 시간)별 순위표 묶음 (여러 세션이 공유하므로 잠금으로 보호)
+
+    조건이 다른 게임끼리는 점수를 비교할 수 없으므로 키마다 순위표를 따로 두고, 처음 쓰일 때 만듭니다.
+    """
+
+    def __init__(self, capacity=100000):
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._boards = {}
+
+    def _board(self, key):
+        board = self._boards.get(key)
+        if board is None:
+            board = self._boards[key] = Leaderboard(self.capacity)
+        return board
+
+    def add_game(self, game):
+        """끝난 게임 추가. 순위 반환"""
+        with self._lock:
+            return self._board(board_key(game)).add(game.score, total_time_ms(game), game.quiz_code)
+
+    def rank(self, game):
+        with self._lock:
+            return self._board(board_key(game)).rank(game.score, total_time_ms(game))
+
+    def top(self, key, n=10):
+        """key: board_key() 값"""
+        with self._lock:
+            return self._board(key).top(n)
+
+    def size(self, key):
+        with self._lock:
+            return self._board(key).total
+
+    def load(self, rows):
+        """(모드, 문제 수, 제한 시간 ms, 점수, 총 시간 ms, 표시 이름) 목록으로 초기화 (시작 시 한 번만 정렬)"""
+        grouped = {}
+        for seq, (mode, count, time_limit_ms, score, total_ms, label) in enumerate(rows):
+            grouped.setdefault((mode, count, time_limit_ms), []).append((-score, total_ms, seq, label))
+        with self._lock:
+            for key, entries in grouped.items():
+                entries.sort()
+                board = self._board(key)
+                board._seq = len(rows)
+                board._total = len(entries)
+                board._entries = entries[:board.capacity]
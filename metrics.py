@@ -0,0 +1,253 @@
+import functools
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+def _process_start_time():
+    """프로세스 시작 시각 (epoch 초). /proc가 없으면 이 모듈을 처음 import한 시각"""
+    try:
+        with open("/proc/self/stat") as f:
+            # 실행 파일 이름에 공백이 있을 수 있으므로 ')' 뒤부터 자름 (22번째 필드 = 시작 tick)
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return time.time() - uptime + int(fields[19]) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return time.time()
+
+
+PROCESS_START = _process_start_time()
+
+
+class ScriptTimings:
+    """스크립트 실행 시간 누적 (프로세스 첫 실행, 세션별 첫 실행, 그 외 재실행)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.import_ms = None
+        self.cold_start_ms = None
+        self.first_run_ms = None
+        self._runs = {'session_first': [0, 0.0, 0.0], 'rerun': [0, 0.0, 0.0]}
+
+    def record_imports(self, seconds):
+        """app.py가 처음 실행될 때의 import 시간 (이후 실행은 sys.modules 캐시라 무시)"""
+        with self._lock:
+            if self.import_ms is None:
+                self.import_ms = seconds * 1000
+
+    def record_run(self, seconds, first_in_session):
+        with self._lock:
+            if self.first_run_ms is None:
+                # 프로세스 시작부터 첫 화면 스크립트가 끝날 때까지
+                self.first_run_ms = seconds * 1000
+                self.cold_start_ms = (time.time() - PROCESS_START) * 1000
+            entry = self._runs['session_first' if first_in_session else 'rerun']
+            entry[0] += 1
+            entry[1] += seconds * 1000
+            entry[2] = max(entry[2], seconds * 1000)
+
+    def snapshot(self):
+        """측정값 dict (ms)"""
+        with self._lock:
+            result = {
+                'process_start': PROCESS_START,
+                'import_ms': self.import_ms,
+                'cold_start_ms': self.cold_start_ms,
+                'first_run_ms': self.first_run_ms,
+            }
+            for kind, (count, total, peak) in self._runs.items():
+                result[f'{kind}_runs'] = count
+                result[f'{kind}_avg_ms'] = total / count if count else None
+                result[f'{kind}_max_ms'] = peak
+            return result
+
+
+# 프로세스 공용 (app.py는 실행마다 다시 실행되지만 import한 모듈은 한 번만 로드됨)
+SCRIPT_TIMINGS = ScriptTimings()
+
+
+# 실행 시간 히스토그램 경계 (초)
+TIME_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+class Instrumentation:
+    """함수별 실행 시간 히스토그램과 재실행 카운터 (Prometheus 텍스트 형식으로 내보냄)
+
+    값은 프로세스 전체에서 누적되며, 켜져 있을 때만 기록하므로 꺼 두면 비용은 검사 한 번입니다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._help = {}
+        # 이름 → {라벨 튜플: [버킷별 개수..., 합계, 개수]}
+        self._histograms = {}
+        # 이름 → {라벨 튜플: 값} (최근에 갱신된 순서)
+        self._counters = {}
+        # 이름 → 라벨 조합 최대 수 (세션별처럼 값이 끝없이 늘어나는 라벨은 최근에 갱신된 것만 유지)
+        self._series_limits = {}
+        # 내보낼 때 호출해 Prometheus 줄 목록을 덧붙이는 함수 (다른 모듈이 가진 측정값용)
+        self._collectors = []
+        # 이름 → 통계 페이지에 보여 줄 백그라운드 구성요소의 stats() 함수
+        self._status = {}
+
+    def describe(self, name, text):
+        self._help[name] = text
+
+    def limit_series(self, name, max_series):
+        """카운터 name의 라벨 조합을 최근에 갱신된 max_series개로 제한"""
+        self._series_limits[name] = max_series
+
+    def add_collector(self, func):
+        """to_prometheus()가 func()이 돌려준 줄 목록을 덧붙이도록 등록"""
+        self._collectors.append(func)
+
+    def add_status(self, name, func):
+        """통계 페이지가 func()이 돌려준 dict를 name 아래에 표시하도록 등록 (같은 이름은 교체)"""
+        self._status[name] = func
+
+    def status(self):
+        """이름 → 등록된 구성요소의 현재 stats() 값"""
+        return {name: func() for name, func in list(self._status.items())}
+
+    def observe(self, name, seconds, labels=()):
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            values = series.get(labels)
+            if values is None:
+                values = series[labels] = [0] * len(TIME_BUCKETS) + [0.0, 0]
+            for i, bound in enumerate(TIME_BUCKETS):
+                if seconds <= bound:
+                    values[i] += 1
+            values[-2] += seconds
+            values[-1] += 1
+
+    def inc(self, name, labels=(), value=1):
+        with self._lock:
+            series = self._counters.get(name)
+            if series is None:
+                series = self._counters[name] = OrderedDict()
+            series[labels] = series.get(labels, 0) + value
+            limit = self._series_limits.get(name)
+            if limit is not None:
+                series.move_to_end(labels)
+                while len(series) > limit:
+                    series.popitem(last=False)
+
+    def timed(self, name, active):
+        """active()가 참일 때 함수 실행 시간을 quiz_function_seconds{function=name}에 기록하는 데코레이터"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not active():
+                    return func(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.observe("quiz_function_seconds", time.perf_counter() - start, (("function", name),))
+            return wrapper
+        return decorator
+
+    def to_prometheus(self):
+        """Prometheus 텍스트 노출 형식 (시작 시간 측정값 포함)"""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._histograms.items()):
+                lines.append(f"# HELP {name} {self._help.get(name, name)}")
+                lines.append(f"# TYPE {name} histogram")
+                for labels, values in sorted(series.items()):
+                    for bound, count in zip(TIME_BUCKETS, values):
+                        lines.append(f"{name}_bucket{_format_labels(labels + (('le', bound),))} {count}")
+                    lines.append(f"{name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {values[-1]}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {values[-2]:.6f}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {values[-1]}")
+            for name, series in sorted(self._counters.items()):
+                lines.append(f"# HELP {name} {self._help.get(name, name)}")
+                lines.append(f"# TYPE {name} counter")
+                for labels, value in sorted(series.items()):
+                    lines.append(f"{name}{_format_labels(labels)} {value}")
+
+        timings = SCRIPT_TIMINGS.snapshot()
+        gauges = (
+            ("quiz_process_start_time_seconds", "프로세스 시작 시각 (epoch)", timings['process_start']),
+            ("quiz_cold_start_seconds", "프로세스 시작부터 첫 화면 스크립트 완료까지", timings['cold_start_ms']),
+            ("quiz_first_run_seconds", "프로세스 첫 스크립트 실행 시간", timings['first_run_ms']),
+            ("quiz_import_seconds", "app.py 첫 실행의 import 시간", timings['import_ms']),
+        )
+        for name, text, value in gauges:
+            if value is None:
+                continue
+            if name != "quiz_process_start_time_seconds":
+                value /= 1000
+            lines += [f"# HELP {name} {text}", f"# TYPE {name} gauge", f"{name} {value:.6f}"]
+        lines += ["# HELP quiz_script_runs_total 끝까지 실행된 스크립트 수", "# TYPE quiz_script_runs_total counter"]
+        for kind in ('session_first', 'rerun'):
+            lines.append(f'quiz_script_runs_total{{kind="{kind}"}} {timings[f"{kind}_runs"]}')
+        for collector in self._collectors:
+            lines += collector()
+        return "\n".join(lines) + "\n"
+
+
+INSTRUMENTATION = Instrumentation()
+INSTRUMENTATION.describe("quiz_function_seconds", "렌더/처리 함수 실행 시간")
+INSTRUMENTATION.describe("quiz_rerun_gap_seconds", "st.rerun() 호출부터 다음 실행 시작까지")
+INSTRUMENTATION.describe("quiz_reruns_total", "계측된 실행 수 (full: 전체 스크립트, fragment: 문제 프래그먼트)")
+INSTRUMENTATION.describe("quiz_question_reruns_total", "문제 번호별 실행 수")
+INSTRUMENTATION.describe("quiz_session_reruns_total", "세션별 실행 수 (최근에 실행된 세션만)")
+# 세션마다 라벨 값이 하나씩 늘어나므로 메모리와 Prometheus 시계열 수가 끝없이 늘지 않게 제한
+SESSION_SERIES_LIMIT = int(os.environ.get("QUIZ_SESSION_SERIES_LIMIT", "200"))
+INSTRUMENTATION.limit_series("quiz_session_reruns_total", SESSION_SERIES_LIMIT)
+INSTRUMENTATION.describe("quiz_st_rerun_total", "st.rerun() 호출 수 (호출 위치별)")
+
+
+def serve_metrics(port, host="127.0.0.1"):
+    """http://host:port/metrics 로 측정값을 제공하는 데몬 스레드 시작"""
+    # 켤 때만 필요하므로 여기서 import (콜드 스타트 비용 제외)
+    import http.server
+
+    class MetricsHandler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = INSTRUMENTATION.to_prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+def write_metrics_file(path, interval=5.0):
+    """interval초마다 측정값을 path에 원자적으로 기록하는 데몬 스레드 시작 (node_exporter textfile용)"""
+    def run():
+        while True:
+            tmp = f"{path}.tmp"
+            with open(tmp, "w") as f:
+                f.write(INSTRUMENTATION.to_prometheus())
+            os.replace(tmp, path)
+            time.sleep(interval)
+
+    thread = threading.Thread(target=run, name="metrics-file", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,159 @@
+import os
+import sqlite3
+import sys
+
+import streamlit as st
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import html_fragments
+from analytics import DIMENSIONS, load_rollups
+from metrics import INSTRUMENTATION, SCRIPT_TIMINGS
+from profiler import PROFILER
+
+# app.py와 같은 결과 저장 파일
+RESULTS_DB = os.environ.get("QUIZ_RESULTS_DB", "quiz_results.db")
+
+# 값이 있으면 ?token=<값>으로 접속해야 볼 수 있음 (없으면 읽기 전용: 프로파일러를 켜고 끌 수 없음)
+ADMIN_TOKEN = os.environ.get("QUIZ_ADMIN_TOKEN", "")
+
+DIMENSION_TITLES = {
+    "operation": "연산별",
+    "regroup": "받아올림/받아내림별",
+    "range": "첫째 수 범위별",
+    "position": "문제 순서별",
+}
+
+
+@st.cache_data(ttl=5, show_spinner=False)
+def read_rollups(path):
+    """집계 테이블만 읽음 (원본 게임 기록은 읽지 않으므로 기록 수와 무관하게 빠름)"""
+    if not os.path.exists(path):
+        return None
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        return load_rollups(conn)
+    except sqlite3.OperationalError:
+        return None
+    finally:
+        conn.close()
+
+
+def rollup_table(rollups, dimension):
+    """한 차원의 표 행 목록"""
+    return [
+        {
+            "구분": key,
+            "문제 수": cell.count,
+            "정답률 (%)": round(cell.accuracy * 100, 1),
+            "평균 (초)": round(cell.mean_ms / 1000, 2),
+            "중앙값 (초)": round(cell.quantile(0.5) / 1000, 2),
+            "p90 (초)": round(cell.quantile(0.9) / 1000, 2),
+        }
+        for key, cell in rollups.dimension(dimension)
+    ]
+
+
+def format_ms(value):
+    return "-" if value is None else f"{value:.0f}ms"
+
+
+def display_startup_metrics():
+    """이 프로세스의 콜드 스타트와 스크립트 실행 시간"""
+    timings = SCRIPT_TIMINGS.snapshot()
+    st.subheader("시작 시간 (이 프로세스)")
+    cols = st.columns(4)
+    cols[0].metric("콜드 스타트", format_ms(timings['cold_start_ms']), help="프로세스 시작부터 첫 화면 스크립트 완료까지")
+    cols[1].metric("첫 실행", format_ms(timings['first_run_ms']), help="프로세스의 첫 스크립트 실행 (import 포함)")
+    cols[2].metric("세션 첫 실행 평균", format_ms(timings['session_first_avg_ms']),
+                   help=f"{timings['session_first_runs']}회")
+    cols[3].metric("재실행 평균", format_ms(timings['rerun_avg_ms']), help=f"{timings['rerun_runs']}회")
+
+
+def display_fragment_cache():
+    """HTML 조각 LRU의 적중률 (QUIZ_FRAGMENT_CACHE_SIZE 조정용)"""
+    rows = []
+    for name, info in html_fragments.cache_stats().items():
+        lookups = info.hits + info.misses
+        rows.append({
+            "조각": name,
+            "적중": info.hits,
+            "누락": info.misses,
+            "적중률 (%)": round(info.hits / lookups * 100, 1) if lookups else None,
+            "항목 수": f"{info.currsize}/{info.maxsize}",
+        })
+    st.caption("HTML 조각 캐시 (이 프로세스)")
+    st.dataframe(rows, hide_index=True, use_container_width=True)
+
+
+def display_background_status():
+    """마감 스케줄러 등 백그라운드 구성요소의 현재 상태 (앱이 처음 쓸 때 등록됨)"""
+    status = INSTRUMENTATION.status()
+    if not status:
+        return
+    st.caption("백그라운드 구성요소 (이 프로세스)")
+    cols = st.columns(len(status))
+    for col, (name, stats) in zip(cols, sorted(status.items())):
+        with col:
+            st.markdown(f"**{name}**")
+            st.dataframe(
+                [{"항목": key, "값": str(round(value, 4) if isinstance(value, float) else value)}
+                 for key, value in stats.items()],
+                hide_index=True, use_container_width=True,
+            )
+
+
+def display_instrumentation():
+    """샘플링 프로파일러 켜기/끄기와 Prometheus 측정값 미리 보기"""
+    st.subheader("계측")
+    # 프로파일러는 프로세스 전체에 걸리고 파일을 쓰므로 토큰으로 보호할 때만 켜고 끌 수 있음
+    locked = not ADMIN_TOKEN
+    col1, col2 = st.columns([1, 3])
+    with col1:
+        if PROFILER.running:
+            if st.button("⏹ 프로파일러 중지", use_container_width=True, disabled=locked):
+                PROFILER.stop()
+                st.rerun()
+        elif st.button("▶ 프로파일러 시작", use_container_width=True, disabled=locked):
+            PROFILER.reset()
+            PROFILER.start()
+            st.rerun()
+    with col2:
+        state = "실행 중" if PROFILER.running else "꺼짐"
+        st.caption(f"샘플링 프로파일러: {state}, 샘플 {PROFILER.samples}개 → `{PROFILER.path}` "
+                   "(flamegraph.pl / speedscope용 접힌 스택)")
+        if locked:
+            st.caption("QUIZ_ADMIN_TOKEN을 설정해야 프로파일러를 켜고 끌 수 있습니다.")
+    display_fragment_cache()
+    display_background_status()
+    with st.expander("Prometheus 측정값 (QUIZ_INSTRUMENT=1 또는 ?instrument=1 세션)", expanded=False):
+        st.code(INSTRUMENTATION.to_prometheus(), language="text")
+
+
+def main():
+    st.set_page_config(page_title="퀴즈 통계", page_icon="📊", layout="wide")
+    st.title("📊 퀴즈 통계")
+
+    if ADMIN_TOKEN and st.query_params.get("token") != ADMIN_TOKEN:
+        st.error("접근 권한이 없습니다.")
+        return
+
+    display_startup_metrics()
+    display_instrumentation()
+
+    if not RESULTS_DB:
+        st.info("결과 저장이 꺼져 있습니다 (QUIZ_RESULTS_DB).")
+        return
+
+    rollups = read_rollups(RESULTS_DB)
+    if rollups is None or not rollups.cells:
+        st.info("아직 집계된 게임이 없습니다.")
+        return
+
+    st.caption("게임이 기록될 때마다 증분 갱신되는 집계입니다. 중앙값/p90은 50ms 폭 히스토그램 근사값입니다.")
+    for dimension in DIMENSIONS:
+        st.subheader(DIMENSION_TITLES[dimension])
+        st.dataframe(rollup_table(rollups, dimension), hide_index=True, use_container_width=True)
+
+
+main()
@@ -0,0 +1,109 @@
+import random
+from array import array
+from types import MappingProxyType
+
+# 두 자리 수 범위
+OPERAND_MIN = 10
+OPERAND_MAX = 99
+
+# 지원하는 연산자 (배열에는 이 튜플의 인덱스를 코드로 저장)
+OPERATORS = ('+', '-')
+
+# 연산 모드별 사용 연산자
+MODE_OPERATORS = MappingProxyType({
+    "addition": ("+",),
+    "subtraction": ("-",),
+    "random": ("+", "-"),
+    # 맞춤 모드: 플레이어 통계로 뽑음 (통계 없이 뽑을 때는 랜덤과 같음)
+    "adaptive": ("+", "-"),
+})
+
+
+class ProblemSet:
+    """한 연산자의 모든 문제를 배열로 저장한 읽기 전용 문제 은행"""
+
+    __slots__ = ('operator', 'left', 'right', 'answers')
+
+    def __init__(self, operator, left, right, answers):
+        self.operator = operator
+        # 읽기 전용 memoryview로 공개 → 모든 세션이 복사 없이 공유
+        self.left = memoryview(left).toreadonly()
+        self.right = memoryview(right).toreadonly()
+        self.answers = memoryview(answers).toreadonly()
+
+    def __len__(self):
+        return len(self.answers)
+
+    def problem(self, index):
+        """(왼쪽 피연산자, 오른쪽 피연산자, 정답)"""
+        return self.left[index], self.right[index], self.answers[index]
+
+    def text(self, index):
+        """화면 표시용 문제 문자열"""
+        return f"{self.left[index]} {self.operator} {self.right[index]}"
+
+    def nbytes(self):
+        return self.left.nbytes + self.right.nbytes + self.answers.nbytes
+
+
+def build_problem_set(operator, low=OPERAND_MIN, high=OPERAND_MAX):
+    """low~high 범위의 모든 문제 생성 (뺄셈은 음수가 나오지 않는 쌍만)"""
+    left = array('B' if high < 256 else 'H')
+    right = array('B' if high < 256 else 'H')
+    answers = array('h' if 2 * high < 32768 else 'i')
+
+    for num1 in range(low, high + 1):
+        for num2 in range(low, high + 1):
+            if operator == '+':
+                answer = num1 + num2
+            elif operator == '-':
+                if num1 < num2:
+                    continue
+                answer = num1 - num2
+            else:
+                raise ValueError(f"지원하지 않는 연산자: {operator}")
+            left.append(num1)
+            right.append(num2)
+            answers.append(answer)
+
+    return ProblemSet(operator, left, right, answers)
+
+
+# import 시 한 번만 생성되는 공용 문제 은행
+BANK = MappingProxyType({
+    '+': build_problem_set('+'),
+    '-': build_problem_set('-'),
+})
+
+
+def draw(mode, count, rng=random):
+    """mode에 맞는 문제를 count개 뽑아 (연산자, 인덱스) 목록으로 반환 (문제당 O(1))"""
+    operators = MODE_OPERATORS[mode]
+    drawn = []
+    for _ in range(count):
+        operator = operators[0] if len(operators) == 1 else rng.choice(operators)
+        drawn.append((operator, rng.randrange(len(BANK[operator]))))
+    return drawn
+
+
+# 퀴즈 코드: 헷갈리는 문자(0/O, 1/I/L)를 뺀 6자리 코드
+QUIZ_CODE_ALPHABET = "23456789ABCDEFGHJKMNPQRSTUVWXYZ"
+QUIZ_CODE_LENGTH = 6
+
+
+def new_quiz_code(rng=random):
+    """새 퀴즈 코드 생성"""
+    return ''.join(rng.choice(QUIZ_CODE_ALPHABET) for _ in range(QUIZ_CODE_LENGTH))
+
+
+def normalize_quiz_code(code):
+    """입력된 퀴즈 코드 정리. 유효하지 않으면 None"""
+    code = (code or "").strip().upper()
+    if not code or any(ch not in QUIZ_CODE_ALPHABET for ch in code):
+        return None
+    return code
+
+
+def quiz_rng(code, mode):
+    """퀴즈 코드와 모드로 결정되는 난수 생성기 (프로세스가 달라도 같은 결과)"""
+    return random.Random(f"{mode}:{code}")
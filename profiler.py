@@ -0,0 +1,88 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+
+class SamplingProfiler:
+    """모든 스레드의 호출 스택을 주기적으로 떠서 flamegraph용 접힌 스택(folded stacks)으로 기록
+
+    출력 한 줄은 "스레드;바깥 함수;...;안쪽 함수 샘플 수" 형식이며, flamegraph.pl이나
+    speedscope에 그대로 넣을 수 있습니다. 샘플링 스레드만 일하므로 앱 코드는 바뀌지 않습니다.
+    """
+
+    def __init__(self, path, interval=0.005, flush_interval=5.0):
+        self.path = path
+        self.interval = interval
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._stacks = Counter()
+        self._samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def samples(self):
+        return self._samples
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """샘플링을 멈추고 파일에 기록"""
+        if not self.running:
+            return
+        self._stop.set()
+        self._thread.join()
+        self.write()
+
+    def reset(self):
+        with self._lock:
+            self._stacks.clear()
+            self._samples = 0
+
+    def _sample(self, own_id, names):
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            stack.append(names.get(thread_id, f"thread-{thread_id}"))
+            with self._lock:
+                self._stacks[";".join(reversed(stack))] += 1
+                self._samples += 1
+
+    def _run(self):
+        own_id = threading.get_ident()
+        next_flush = time.monotonic() + self.flush_interval
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            self._sample(own_id, names)
+            if time.monotonic() >= next_flush:
+                self.write()
+                next_flush = time.monotonic() + self.flush_interval
+
+    def write(self):
+        """지금까지의 접힌 스택을 파일에 원자적으로 기록"""
+        with self._lock:
+            lines = [f"{stack} {count}\n" for stack, count in self._stacks.most_common()]
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            f.writelines(lines)
+        os.replace(tmp, self.path)
+
+
+# 프로세스 공용 프로파일러 (app.py의 QUIZ_PROFILE=1 또는 통계 페이지에서 켜고 끔)
+PROFILER = SamplingProfiler(os.environ.get("QUIZ_PROFILE_FILE", "quiz_profile.folded"))
@@ -0,0 +1,267 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import namedtuple
+
+import problem_bank
+
+logger = logging.getLogger(__name__)
+
+# 방 상태
+ROOM_LOBBY = "lobby"
+ROOM_RUNNING = "running"
+ROOM_FINISHED = "finished"
+
+# 알림 종류: 문제 시작, 순위 갱신, 경주 종료
+EVENT_QUESTION = "question"
+EVENT_STANDINGS = "standings"
+EVENT_FINISHED = "finished"
+
+# 한 방의 순위 (점수 내림차순, 총 시간 오름차순)
+Standing = namedtuple('Standing', ['player', 'name', 'score', 'answered', 'total_ms'])
+
+# 스크립트 스레드가 읽는 방 상태 (바뀔 때마다 새로 만들어 통째로 교체하므로 잠금 없이 읽음)
+RoomSnapshot = namedtuple('RoomSnapshot', [
+    'code', 'mode', 'count', 'time_limit', 'host', 'state',
+    'question', 'question_started_ns', 'standings', 'version',
+])
+
+
+class _Member:
+    __slots__ = ('name', 'score', 'answered', 'total_ms', 'notify')
+
+    def __init__(self, name, notify):
+        self.name = name
+        self.score = 0
+        self.answered = 0
+        self.total_ms = 0
+        self.notify = notify
+
+
+class _Room:
+    __slots__ = (
+        'code', 'mode', 'count', 'time_limit', 'host', 'members', 'state',
+        'question', 'question_started_ns', 'version', 'snapshot',
+        'all_answered', 'flush_handle', 'task',
+    )
+
+    def __init__(self, code, mode, count, time_limit, host):
+        self.code = code
+        self.mode = mode
+        self.count = count
+        self.time_limit = time_limit
+        self.host = host
+        self.members = {}
+        self.state = ROOM_LOBBY
+        # 진행 중인 문제 번호 (시작 전에는 -1)
+        self.question = -1
+        self.question_started_ns = 0
+        self.version = 0
+        self.snapshot = None
+        self.all_answered = None
+        self.flush_handle = None
+        self.task = None
+
+
+class RaceHub:
+    """교실 경주 방을 관리하는 asyncio 허브 (프로세스 공용, 전용 스레드의 이벤트 루프에서 실행)
+
+    방마다 코루틴 하나가 문제 시작 시각을 정해 모든 참가자에게 알리고, 모두 답했거나 제한 시간이
+    지나면 다음 문제로 넘어갑니다. 답안 보고는 방을 "변경됨"으로 표시만 하고 tick초마다 한 번
+    순위를 알리므로, 같은 tick에 N명이 답해도 알림은 한 번입니다. 방 상태는 루프 스레드에서만
+    바꾸고 스크립트 스레드는 RoomSnapshot만 읽으므로 세션이 방을 폴링할 필요가 없습니다.
+
+    notify(종류, RoomSnapshot) 콜백은 루프 스레드에서 호출되므로 오래 걸리면 안 됩니다.
+    """
+
+    def __init__(self, tick=0.2, break_seconds=1.5, grace=0.5, finished_ttl=600, clock=time.monotonic_ns):
+        self.tick = tick
+        # 문제 사이에 결과를 보여 주는 시간과, 제한 시간 뒤 늦게 도착한 답을 기다리는 시간 (초)
+        self.break_seconds = break_seconds
+        self.grace = grace
+        self.finished_ttl = finished_ttl
+        self.clock = clock
+        self._rooms = {}
+        self._reports = 0
+        self._broadcasts = 0
+        self._notifications = 0
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="race-hub", daemon=True)
+        self._thread.start()
+
+    def _call(self, func, *args):
+        """루프 스레드에서 func(*args)를 실행하고 결과를 기다림 (스크립트 스레드용)"""
+        async def run():
+            return func(*args)
+        return asyncio.run_coroutine_threadsafe(run(), self._loop).result()
+
+    # 스크립트 스레드에서 호출하는 API
+
+    def create_room(self, mode, count, time_limit, player, name, notify):
+        """방을 만들고 방장으로 입장. 방 코드 반환 (방 코드는 그대로 퀴즈 코드로 쓰임)"""
+        return self._call(self._create_room, mode, count, time_limit, player, name, notify)
+
+    def join(self, code, player, name, notify):
+        """방에 입장 (이미 참가자면 이름과 알림만 갱신). 방이 없거나 이미 시작했으면 None"""
+        return self._call(self._join, code, player, name, notify)
+
+    def leave(self, code, player):
+        self._loop.call_soon_threadsafe(self._leave, code, player)
+
+    def start(self, code, player):
+        """방장이 경주 시작. 시작했으면 True"""
+        return self._call(self._start, code, player)
+
+    def report(self, code, player, answered, score, total_ms):
+        """참가자의 진행 상황 보고 (기다리지 않음, 순위 알림은 다음 tick에 한꺼번에)"""
+        self._loop.call_soon_threadsafe(self._report, code, player, answered, score, total_ms)
+
+    def snapshot(self, code):
+        """방의 최신 RoomSnapshot (없으면 None)"""
+        room = self._rooms.get(code)
+        return None if room is None else room.snapshot
+
+    def stats(self):
+        """방/참가자 수와 보고, 방송, 알림 횟수"""
+        rooms = list(self._rooms.values())
+        return {
+            'rooms': len(rooms),
+            'members': sum(len(room.members) for room in rooms),
+            'reports': self._reports,
+            'broadcasts': self._broadcasts,
+            'notifications': self._notifications,
+        }
+
+    # 이하 루프 스레드 전용
+
+    def _create_room(self, mode, count, time_limit, player, name, notify):
+        code = problem_bank.new_quiz_code()
+        while code in self._rooms:
+            code = problem_bank.new_quiz_code()
+        room = self._rooms[code] = _Room(code, mode, count, time_limit, player)
+        room.members[player] = _Member(name, notify)
+        self._update_snapshot(room)
+        return code
+
+    def _join(self, code, player, name, notify):
+        room = self._rooms.get(code)
+        if room is None:
+            return None
+        member = room.members.get(player)
+        if member is not None:
+            # 새로고침/재접속: 같은 플레이어의 새 세션으로 알림 대상 교체
+            member.name = name
+            member.notify = notify
+        elif room.state != ROOM_LOBBY:
+            return None
+        else:
+            room.members[player] = _Member(name, notify)
+        # 입장한 세션이 바로 자기 자신을 보도록 스냅샷은 지금 갱신하고, 알림은 다음 tick에 모아서
+        self._update_snapshot(room)
+        self._mark_dirty(room)
+        return room.snapshot
+
+    def _leave(self, code, player):
+        room = self._rooms.get(code)
+        if room is None or room.members.pop(player, None) is None:
+            return
+        if not room.members:
+            self._close(room)
+            return
+        if room.host == player:
+            room.host = next(iter(room.members))
+        self._check_all_answered(room)
+        self._mark_dirty(room)
+
+    def _close(self, room):
+        if self._rooms.get(room.code) is room:
+            del self._rooms[room.code]
+        if room.task is not None:
+            room.task.cancel()
+        if room.flush_handle is not None:
+            room.flush_handle.cancel()
+
+    def _start(self, code, player):
+        room = self._rooms.get(code)
+        if room is None or room.host != player or room.state != ROOM_LOBBY:
+            return False
+        room.state = ROOM_RUNNING
+        room.task = self._loop.create_task(self._run_race(room))
+        self._publish(room, EVENT_STANDINGS)
+        return True
+
+    async def _run_race(self, room):
+        """문제마다 시작을 알리고 모두 답하거나 제한 시간이 지날 때까지 기다림"""
+        await asyncio.sleep(self.break_seconds)
+        for question in range(room.count):
+            room.question = question
+            room.question_started_ns = self.clock()
+            room.all_answered = asyncio.Event()
+            self._publish(room, EVENT_QUESTION)
+            self._check_all_answered(room)
+            try:
+                await asyncio.wait_for(room.all_answered.wait(), room.time_limit + self.grace)
+            except asyncio.TimeoutError:
+                pass
+            if question < room.count - 1:
+                await asyncio.sleep(self.break_seconds)
+        room.state = ROOM_FINISHED
+        self._publish(room, EVENT_FINISHED)
+        # 결과 화면에서 순위를 볼 수 있도록 잠시 남겨 둠
+        self._loop.call_later(self.finished_ttl, self._close, room)
+
+    def _report(self, code, player, answered, score, total_ms):
+        self._reports += 1
+        room = self._rooms.get(code)
+        member = None if room is None else room.members.get(player)
+        if member is None:
+            return
+        member.answered = answered
+        member.score = score
+        member.total_ms = total_ms
+        self._check_all_answered(room)
+        self._mark_dirty(room)
+
+    def _check_all_answered(self, room):
+        if room.all_answered is not None and all(
+            member.answered > room.question for member in room.members.values()
+        ):
+            room.all_answered.set()
+
+    def _mark_dirty(self, room):
+        """다음 tick에 순위 알림 예약 (이미 예약되어 있으면 아무것도 안 함)"""
+        if room.flush_handle is None:
+            room.flush_handle = self._loop.call_later(self.tick, self._flush, room)
+
+    def _flush(self, room):
+        room.flush_handle = None
+        if self._rooms.get(room.code) is room:
+            self._publish(room, EVENT_STANDINGS)
+
+    def _update_snapshot(self, room):
+        room.version += 1
+        standings = sorted(
+            (Standing(player, member.name, member.score, member.answered, member.total_ms)
+             for player, member in room.members.items()),
+            key=lambda standing: (-standing.score, standing.total_ms),
+        )
+        room.snapshot = RoomSnapshot(
+            room.code, room.mode, room.count, room.time_limit, room.host, room.state,
+            room.question, room.question_started_ns, tuple(standings), room.version,
+        )
+
+    def _publish(self, room, kind):
+        """스냅샷을 새로 만들고 모든 참가자에게 한 번씩 알림 (예약된 순위 알림은 이번에 포함)"""
+        if room.flush_handle is not None:
+            room.flush_handle.cancel()
+            room.flush_handle = None
+        self._update_snapshot(room)
+        self._broadcasts += 1
+        snapshot = room.snapshot
+        for member in list(room.members.values()):
+            self._notifications += 1
+            try:
+                member.notify(kind, snapshot)
+            except Exception:
+                logger.exception("race notify failed")
@@ -0,0 +1,254 @@
+import atexit
+import logging
+import queue
+import sqlite3
+import threading
+import time
+
+import problem_bank
+from analytics import ROLLUP_SCHEMA, Rollups, load_rollups, rebuild_rollups
+from game_state import DEFAULT_TIME_LIMIT_NS, NO_CLIENT_TIME
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    quiz_code TEXT,
+    mode TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    question_count INTEGER NOT NULL,
+    finished_at REAL NOT NULL,
+    time_limit_ms INTEGER
+);
+CREATE TABLE IF NOT EXISTS answers (
+    game_id INTEGER NOT NULL REFERENCES games(id),
+    position INTEGER NOT NULL,
+    left_operand INTEGER NOT NULL,
+    operator TEXT NOT NULL,
+    right_operand INTEGER NOT NULL,
+    answer INTEGER NOT NULL,
+    user_answer INTEGER,
+    outcome INTEGER NOT NULL,
+    response_ns INTEGER NOT NULL,
+    client_response_ms INTEGER,
+    PRIMARY KEY (game_id, position)
+);
+"""
+
+
+def game_record(game, finished_at=None):
+    """끝난 GameState → 저장용 튜플 (게임 정보, 문제별 행 목록)"""
+    rows = [
+        (
+            i,
+            game.left[i],
+            problem_bank.OPERATORS[game.operators[i]],
+            game.right[i],
+            game.answers[i],
+            game.user_answer(i),
+            game.outcomes[i],
+            game.response_ns[i],
+            None if game.client_response_ms[i] == NO_CLIENT_TIME else game.client_response_ms[i],
+        )
+        for i in range(len(game))
+    ]
+    info = (game.quiz_code, game.mode, game.score, len(game), finished_at or time.time(),
+            game.time_limit_ns // 1_000_000)
+    return info, rows
+
+
+class ResultStore:
+    """끝난 게임을 메모리 큐에 모았다가 백그라운드 스레드가 SQLite(WAL)에 묶어서 기록
+
+    submit()은 큐에 넣기만 하므로 화면 스크립트는 디스크 I/O를 기다리지 않습니다.
+    큐가 가득 차면 잠깐 기다린 뒤 버리고, 얼마나 밀려 있는지는 stats()로 확인합니다.
+    기록하는 같은 트랜잭션에서 answer_rollups 집계도 배치만큼 증분 갱신합니다.
+    """
+
+    def __init__(self, path, capacity=10000, batch_size=256, flush_interval=0.5, put_timeout=0.05):
+        self.path = path
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self._queue = queue.Queue(maxsize=capacity)
+        self._lock = threading.Lock()
+        self._submitted = 0
+        self._written = 0
+        self._dropped = 0
+        self._batches = 0
+        self._last_flush_ms = 0.0
+        self._max_depth = 0
+        self._closed = threading.Event()
+
+        conn = self._connect()
+        conn.executescript(SCHEMA)
+        conn.executescript(ROLLUP_SCHEMA)
+        # 제한 시간 설정 도입 전 DB에 열 추가 (기존 게임은 NULL = 기본 제한 시간)
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(games)")}
+        if 'time_limit_ms' not in columns:
+            conn.execute("ALTER TABLE games ADD COLUMN time_limit_ms INTEGER")
+        # 집계 도입 전에 쌓인 기록이 있으면 한 번만 다시 집계
+        if (conn.execute("SELECT 1 FROM answer_rollups LIMIT 1").fetchone() is None
+                and conn.execute("SELECT 1 FROM answers LIMIT 1").fetchone() is not None):
+            rebuild_rollups(conn)
+        conn.close()
+
+        self._thread = threading.Thread(target=self._run, name="result-store", daemon=True)
+        self._thread.start()
+        # 종료 시 대기 중인 게임까지 기록
+        atexit.register(self.close)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def submit(self, game):
+        """끝난 게임을 기록 대기열에 추가. 큐가 가득 차 버려졌으면 False"""
+        record = game_record(game)
+        try:
+            self._queue.put(record, timeout=self.put_timeout)
+        except queue.Full:
+            with self._lock:
+                self._dropped += 1
+            return False
+        with self._lock:
+            self._submitted += 1
+            self._max_depth = max(self._max_depth, self._queue.qsize())
+        return True
+
+    def stats(self):
+        """큐 적재량과 기록 현황 (backpressure는 0~1 사이의 큐 사용률)"""
+        depth = self._queue.qsize()
+        with self._lock:
+            return {
+                'queue_depth': depth,
+                'capacity': self.capacity,
+                'backpressure': depth / self.capacity,
+                'max_depth': self._max_depth,
+                'submitted': self._submitted,
+                'written': self._written,
+                'dropped': self._dropped,
+                'batches': self._batches,
+                'last_flush_ms': self._last_flush_ms,
+            }
+
+    def prometheus_lines(self):
+        """metrics.Instrumentation.to_prometheus()에 덧붙이는 큐 적재량, 역압, 기록/버림 수"""
+        stats = self.stats()
+        lines = [
+            "# HELP quiz_result_queue_depth 기록을 기다리는 게임 수",
+            "# TYPE quiz_result_queue_depth gauge",
+            f"quiz_result_queue_depth {stats['queue_depth']}",
+            "# HELP quiz_result_queue_max_depth 지금까지 가장 깊었던 큐 적재량",
+            "# TYPE quiz_result_queue_max_depth gauge",
+            f"quiz_result_queue_max_depth {stats['max_depth']}",
+            "# HELP quiz_result_backpressure 큐 사용률 (0~1)",
+            "# TYPE quiz_result_backpressure gauge",
+            f"quiz_result_backpressure {stats['backpressure']:.6f}",
+            "# HELP quiz_result_games_total 결과 저장소의 게임 수 (submitted: 큐에 넣음, written: 기록, dropped: 버림)",
+            "# TYPE quiz_result_games_total counter",
+        ]
+        for key in ('submitted', 'written', 'dropped'):
+            lines.append(f'quiz_result_games_total{{state="{key}"}} {stats[key]}')
+        lines += [
+            "# HELP quiz_result_batches_total 기록한 배치 수",
+            "# TYPE quiz_result_batches_total counter",
+            f"quiz_result_batches_total {stats['batches']}",
+            "# HELP quiz_result_last_flush_seconds 마지막 배치 기록 시간",
+            "# TYPE quiz_result_last_flush_seconds gauge",
+            f"quiz_result_last_flush_seconds {stats['last_flush_ms'] / 1000:.6f}",
+        ]
+        return lines
+
+    def flush(self, timeout=None):
+        """지금까지 넣은 게임이 모두 기록될 때까지 대기"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                if self._written >= self._submitted:
+                    return True
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+
+    def close(self):
+        """남은 게임을 기록하고 기록 스레드 종료"""
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        self._thread.join()
+
+    def leaderboard_rows(self):
+        """저장된 게임의 (모드, 문제 수, 제한 시간 ms, 점수, 총 응답 시간 ms, 퀴즈 코드) 목록"""
+        conn = sqlite3.connect(self.path)
+        try:
+            return conn.execute(
+                "SELECT g.mode, g.question_count, COALESCE(g.time_limit_ms, ?), g.score, "
+                "SUM(a.response_ns) / 1000000, g.quiz_code "
+                "FROM games g JOIN answers a ON a.game_id = g.id GROUP BY g.id",
+                (DEFAULT_TIME_LIMIT_NS // 1_000_000,),
+            ).fetchall()
+        finally:
+            conn.close()
+
+    def rollups(self):
+        """답안 집계 (집계 테이블만 읽음)"""
+        conn = sqlite3.connect(self.path)
+        try:
+            return load_rollups(conn)
+        finally:
+            conn.close()
+
+    def _take_batch(self):
+        """최대 batch_size개를 꺼냄 (첫 항목은 flush_interval까지 기다림)"""
+        try:
+            batch = [self._queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, conn, batch):
+        start = time.perf_counter()
+        rollups = Rollups()
+        with conn:
+            for info, rows in batch:
+                game_id = conn.execute(
+                    "INSERT INTO games (quiz_code, mode, score, question_count, finished_at, time_limit_ms) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    info,
+                ).lastrowid
+                conn.executemany(
+                    "INSERT INTO answers VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [(game_id, *row) for row in rows],
+                )
+                rollups.add_record_rows(rows)
+            rollups.merge_into(conn)
+        with self._lock:
+            self._written += len(batch)
+            self._batches += 1
+            self._last_flush_ms = (time.perf_counter() - start) * 1000
+
+    def _run(self):
+        conn = self._connect()
+        try:
+            while not (self._closed.is_set() and self._queue.empty()):
+                batch = self._take_batch()
+                if batch:
+                    try:
+                        self._write(conn, batch)
+                    except sqlite3.Error:
+                        logger.exception("result store write failed")
+                        with self._lock:
+                            self._dropped += len(batch)
+                            self._submitted -= len(batch)
+        finally:
+            conn.close()
@@ -0,0 +1,190 @@
+import sqlite3
+import threading
+import time
+import weakref
+from collections import OrderedDict
+
+
+def load_codecs():
+    """저장 이름별 (직렬화, 역직렬화) 함수
+
+    기본 메모리 저장소는 직렬화하지 않으므로 SQLite 저장소를 만들 때만 import합니다.
+    """
+    from adaptive import PlayerStats
+    from game_state import GameState
+    return {
+        'game': (GameState.to_bytes, GameState.from_bytes),
+        'stats': (PlayerStats.to_bytes, PlayerStats.from_bytes),
+    }
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS player_state (
+    player TEXT NOT NULL,
+    name TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    data BLOB NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (player, name)
+);
+"""
+
+
+class MemoryBackend:
+    """프로세스 메모리에 플레이어별 상태를 보관하는 기본 저장소
+
+    객체를 그대로 들고 있으므로 직렬화 비용이 없지만, 프로세스가 바뀌거나 재시작하면 사라집니다.
+    capacity명을 넘으면 가장 오래 쓰지 않은 플레이어부터 버립니다.
+    """
+
+    def __init__(self, capacity=10000):
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._players = OrderedDict()
+
+    def load(self, player_id, name):
+        """저장된 객체 (없으면 None)"""
+        with self._lock:
+            state = self._players.get(player_id)
+            if state is None:
+                return None
+            self._players.move_to_end(player_id)
+            return state.get(name)
+
+    def save(self, player_id, name, value):
+        """객체 저장 (한 프로세스 안에서는 충돌이 없으므로 항상 True)"""
+        with self._lock:
+            self._players.setdefault(player_id, {})[name] = value
+            self._players.move_to_end(player_id)
+            while len(self._players) > self.capacity:
+                self._players.popitem(last=False)
+        return True
+
+    def delete(self, player_id, name):
+        with self._lock:
+            self._players.get(player_id, {}).pop(name, None)
+
+    def stats(self):
+        with self._lock:
+            return {'players': len(self._players)}
+
+
+class SQLiteBackend:
+    """여러 앱 프로세스가 공유하는 SQLite(WAL) 저장소
+
+    행마다 version을 두고, 프로세스 캐시에 (version, 객체)를 보관합니다. 읽을 때는 version만
+    조회해 캐시와 같으면 역직렬화 없이 캐시 객체를 돌려주므로, 자주 읽는 게임 상태는
+    프로세스 안에서 재사용되고 다른 프로세스가 쓴 변경만 다시 읽습니다.
+    이 프로세스가 읽거나 쓴 객체를 다시 저장할 때는 그 객체를 읽은 version일 때만 쓰므로
+    (compare-and-swap) 다른 프로세스가 그 사이에 쓴 새 상태를 옛 객체로 덮어쓰지 않습니다.
+    """
+
+    def __init__(self, path, cache_size=4096, busy_timeout_ms=5000, max_age=7 * 24 * 3600):
+        self.path = path
+        self.cache_size = cache_size
+        self.codecs = load_codecs()
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()
+        # 객체 → 그 객체를 읽거나 쓴 version (캐시에서 밀려난 옛 객체도 살아 있는 동안 기억)
+        self._versions = weakref.WeakKeyDictionary()
+        self._hits = 0
+        self._misses = 0
+        self._conflicts = 0
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+        self._conn.executescript(SCHEMA)
+        # 오래된 플레이어 상태 정리
+        self._conn.execute("DELETE FROM player_state WHERE updated_at < ?", (time.time() - max_age,))
+
+    def _remember(self, key, version, value):
+        self._versions[value] = version
+        self._cache[key] = (version, value)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def load(self, player_id, name):
+        """저장된 객체 (없으면 None). 다른 프로세스가 바꾸지 않았으면 캐시 객체 그대로 반환"""
+        key = (player_id, name)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT version FROM player_state WHERE player = ? AND name = ?", key
+            ).fetchone()
+            if row is None:
+                self._cache.pop(key, None)
+                return None
+            cached = self._cache.get(key)
+            if cached is not None and cached[0] == row[0]:
+                self._hits += 1
+                self._cache.move_to_end(key)
+                return cached[1]
+
+            self._misses += 1
+            row = self._conn.execute(
+                "SELECT version, data FROM player_state WHERE player = ? AND name = ?", key
+            ).fetchone()
+            if row is None:
+                return None
+            try:
+                value = self.codecs[name][1](row[1])
+            except ValueError:
+                # 형식이 바뀌기 전에 저장된 상태는 없는 것으로 취급 (다음 저장 때 덮어씀)
+                return None
+            self._remember(key, row[0], value)
+            return value
+
+    def save(self, player_id, name, value):
+        """객체 저장 (version 1 증가). 다른 프로세스가 먼저 바꿔 쓰지 못했으면 False
+
+        value가 이 프로세스에서 읽거나 쓴 객체면 그때의 version일 때만 쓰고,
+        새로 만든 객체(새 게임 등)면 무조건 씁니다.
+        """
+        key = (player_id, name)
+        data = self.codecs[name][0](value)
+        with self._lock:
+            expected = self._versions.get(value)
+            if expected is not None:
+                row = self._conn.execute(
+                    "UPDATE player_state SET version = version + 1, data = ?, updated_at = ? "
+                    "WHERE player = ? AND name = ? AND version = ? RETURNING version",
+                    (data, time.time(), player_id, name, expected),
+                ).fetchone()
+                if row is None:
+                    # 캐시는 다음 load()에서 version을 비교해 새로 읽으므로 따로 비우지 않음
+                    self._conflicts += 1
+                    return False
+            else:
+                row = self._conn.execute(
+                    "INSERT INTO player_state (player, name, version, data, updated_at) "
+                    "VALUES (?, ?, 1, ?, ?) "
+                    "ON CONFLICT (player, name) DO UPDATE SET "
+                    "version = version + 1, data = excluded.data, updated_at = excluded.updated_at "
+                    "RETURNING version",
+                    (player_id, name, data, time.time()),
+                ).fetchone()
+            self._remember(key, row[0], value)
+            return True
+
+    def delete(self, player_id, name):
+        key = (player_id, name)
+        with self._lock:
+            self._conn.execute("DELETE FROM player_state WHERE player = ? AND name = ?", key)
+            self._cache.pop(key, None)
+
+    def stats(self):
+        """프로세스 캐시 적중 현황과 compare-and-swap 충돌 수"""
+        with self._lock:
+            return {'cached': len(self._cache), 'hits': self._hits, 'misses': self._misses,
+                    'conflicts': self._conflicts}
+
+
+def create_backend(kind, path=None):
+    """설정값으로 저장소 생성 ("memory" 또는 "sqlite")"""
+    if kind == "memory":
+        return MemoryBackend()
+    if kind == "sqlite":
+        return SQLiteBackend(path)
+    raise ValueError(f"지원하지 않는 상태 저장소: {kind}")
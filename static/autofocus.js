@@ -0,0 +1,68 @@
+// 답안 입력칸만 대상 (시작 화면의 퀴즈 코드, 경주 이름, 페이지 수 입력칸 등은 건드리지 않음)
+const ANSWER_INPUT = '[class*="st-key-answer_input_"] input';
+
+function focusInputAggressively() {
+    // 여러 번 시도하여 확실히 포커스
+    let attempts = 0;
+    const maxAttempts = 10;
+    
+    function tryFocus() {
+        const inputs = Array.from(document.querySelectorAll(ANSWER_INPUT))
+            .filter(input => input.offsetParent !== null);
+        if (inputs.length > 0) {
+            const input = inputs[inputs.length - 1];
+            input.focus();
+            input.select();
+            
+            // 포커스가 제대로 되었는지 확인
+            if (document.activeElement === input) {
+                console.log('Input focused successfully');
+                return true;
+            }
+        }
+        
+        attempts++;
+        if (attempts < maxAttempts) {
+            setTimeout(tryFocus, 50);
+        }
+        return false;
+    }
+    
+    tryFocus();
+}
+
+// 즉시 실행
+focusInputAggressively();
+
+// DOM 변경 감지하여 새 답안 입력칸이 생기면 다시 포커스
+const observer = new MutationObserver(function(mutations) {
+    let shouldFocus = false;
+    mutations.forEach(function(mutation) {
+        if (mutation.type === 'childList') {
+            mutation.addedNodes.forEach(function(node) {
+                if (node.nodeType === 1) { // Element node
+                    if ((node.matches && node.matches(ANSWER_INPUT))
+                            || (node.querySelector && node.querySelector(ANSWER_INPUT))) {
+                        shouldFocus = true;
+                    }
+                }
+            });
+        }
+    });
+    
+    if (shouldFocus) {
+        setTimeout(focusInputAggressively, 10);
+    }
+});
+
+observer.observe(document.body, {
+    childList: true,
+    subtree: true
+});
+
+// 문제를 푸는 중에는 페이지를 클릭해도 답안 입력칸 포커스 유지 (다른 화면에서는 아무것도 하지 않음)
+document.addEventListener('click', function(e) {
+    if (e.target.tagName !== 'INPUT' && document.querySelector(ANSWER_INPUT)) {
+        setTimeout(focusInputAggressively, 10);
+    }
+});
@@ -0,0 +1,283 @@
+"""인쇄용 학습지와 정답지 내보내기 (PDF, HTML, CSV)
+
+사용법: python worksheet.py -o out.pdf --pages 10000 [--format pdf] [--answers] [--workers 4]
+
+페이지마다 퀴즈 코드를 하나씩 발급하고 앱과 같은 QuizEngine.draw_questions()로 문제를 뽑으므로,
+학습지에 적힌 코드를 앱에 입력하면 같은 문제를 풀 수 있습니다. 페이지는 묶음 단위로 프로세스 풀에서
+만들어 순서대로 파일에 바로 쓰며, 처리 중인 묶음 수가 정해져 있어 페이지 수와 무관하게 메모리가 일정합니다.
+"""
+import os
+import random
+import sys
+from array import array
+from collections import deque
+
+import problem_bank
+from engine import QuizEngine
+
+FORMATS = ("pdf", "html", "csv")
+
+MIME_TYPES = {
+    "pdf": "application/pdf",
+    "html": "text/html",
+    "csv": "text/csv",
+}
+
+MODE_TITLES = {
+    "random": "덧셈과 뺄셈",
+    "addition": "덧셈",
+    "subtraction": "뺄셈",
+    "adaptive": "덧셈과 뺄셈",
+}
+
+# PDF 페이지 (A4, pt)와 배치
+PDF_WIDTH = 595
+PDF_HEIGHT = 842
+PDF_MARGIN = 50
+PDF_LINE_HEIGHT = 26
+# 객체 1: 카탈로그, 2: 페이지 트리, 3: 글꼴, 이후 페이지마다 (내용, 페이지) 2개
+PDF_FIRST_PAGE_OBJECT = 4
+
+
+def page_code(seed, page):
+    """작업 시드와 페이지 번호로 결정되는 퀴즈 코드 (어느 프로세스에서 만들어도 같음)"""
+    return problem_bank.new_quiz_code(random.Random(f"{seed}:{page}"))
+
+
+def page_questions(engine, mode, code):
+    """페이지 하나의 (문제 문자열, 정답) 목록"""
+    questions = []
+    for operator, index in engine.draw_questions(mode, code):
+        problems = problem_bank.BANK[operator]
+        questions.append((problems.text(index), problems.answers[index]))
+    return questions
+
+
+def page_columns(count):
+    """한 페이지의 문제 열 수 (20문제 넘으면 4열)"""
+    return 2 if count <= 20 else 4
+
+
+def _pdf_text(value):
+    return str(value).replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def render_pdf_page(page, code, questions, answer_key, mode):
+    """PDF 페이지 하나의 (내용 객체, 페이지 객체) 바이트열과 각 객체의 상대 위치
+
+    PDF 기본 글꼴은 한글이 없으므로 PDF 안의 글자는 ASCII만 씁니다.
+    """
+    title = "Answer key" if answer_key else "Worksheet"
+    lines = [
+        "BT",
+        f"/F1 18 Tf {PDF_MARGIN} {PDF_HEIGHT - PDF_MARGIN - 18} Td ({_pdf_text(title)} #{page}) Tj",
+        "/F1 11 Tf 0 -22 Td "
+        f"(Quiz code: {code}    Mode: {mode}    Name: ______________    Score: ____ / {len(questions)}) Tj",
+        "ET",
+    ]
+    columns = page_columns(len(questions))
+    rows = -(-len(questions) // columns)
+    column_width = (PDF_WIDTH - 2 * PDF_MARGIN) / columns
+    top = PDF_HEIGHT - PDF_MARGIN - 80
+    for i, (text, answer) in enumerate(questions):
+        x = PDF_MARGIN + (i // rows) * column_width
+        y = top - (i % rows) * PDF_LINE_HEIGHT
+        result = answer if answer_key else "______"
+        lines.append(f"BT /F1 12 Tf {x:.1f} {y} Td ({i + 1}. {text} = {result}) Tj ET")
+    stream = "\n".join(lines).encode("ascii")
+
+    content_id = PDF_FIRST_PAGE_OBJECT + 2 * (page - 1)
+    content = (f"{content_id} 0 obj\n<< /Length {len(stream)} >>\nstream\n".encode()
+               + stream + b"\nendstream\nendobj\n")
+    page_obj = (f"{content_id + 1} 0 obj\n<< /Type /Page /Parent 2 0 R "
+                f"/MediaBox [0 0 {PDF_WIDTH} {PDF_HEIGHT}] "
+                f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>\nendobj\n").encode()
+    return content + page_obj, (0, len(content))
+
+
+def render_html_page(page, code, questions, answer_key, mode):
+    title = "정답지" if answer_key else "학습지"
+    items = "".join(
+        f"<li>{text} = <b>{answer if answer_key else '&nbsp;' * 8}</b></li>"
+        for text, answer in questions
+    )
+    return (
+        f"<section class='page'><h1>{title} #{page} · {MODE_TITLES.get(mode, mode)}</h1>"
+        f"<p>퀴즈 코드: <b>{code}</b> &nbsp; 이름: ______________ &nbsp; 점수: ____ / {len(questions)}</p>"
+        f"<ol style='columns: {page_columns(len(questions))}'>{items}</ol></section>\n"
+    ).encode()
+
+
+def render_csv_page(page, code, questions, answer_key, mode):
+    return "".join(
+        f"{page},{code},{i + 1},{text},{answer if answer_key else ''}\n"
+        for i, (text, answer) in enumerate(questions)
+    ).encode()
+
+
+def render_chunk(fmt, answer_key, mode, count, seed, first_page, last_page):
+    """first_page~last_page 페이지를 렌더링 (프로세스 풀 작업 단위)
+
+    (바이트열, 묶음 안에서의 PDF 객체 상대 위치 목록) 반환. PDF가 아니면 위치 목록은 비어 있습니다.
+    """
+    engine = QuizEngine(question_count=count)
+    parts = []
+    offsets = []
+    size = 0
+    for page in range(first_page, last_page + 1):
+        code = page_code(seed, page)
+        questions = page_questions(engine, mode, code)
+        if fmt == "pdf":
+            data, relative = render_pdf_page(page, code, questions, answer_key, mode)
+            offsets.extend(size + offset for offset in relative)
+        elif fmt == "html":
+            data = render_html_page(page, code, questions, answer_key, mode)
+        else:
+            data = render_csv_page(page, code, questions, answer_key, mode)
+        parts.append(data)
+        size += len(data)
+    return b"".join(parts), offsets
+
+
+def iter_chunks(fmt, pages, answer_key, mode, count, seed, workers, chunk_pages):
+    """페이지 묶음 결과를 순서대로 생성
+
+    workers가 1보다 크면 프로세스 풀에 묶음을 나눠 주되, 결과를 기다리는 묶음은 workers * 2개까지만
+    두어 쓰기가 느려도 메모리가 늘지 않게 합니다.
+    """
+    ranges = ((first, min(first + chunk_pages - 1, pages)) for first in range(1, pages + 1, chunk_pages))
+    if workers <= 1:
+        for first, last in ranges:
+            yield render_chunk(fmt, answer_key, mode, count, seed, first, last)
+        return
+
+    # 앱의 내려받기 버튼은 workers=1만 쓰므로 풀은 필요할 때만 import
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for first, last in ranges:
+            pending.append(pool.submit(render_chunk, fmt, answer_key, mode, count, seed, first, last))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _html_header(answer_key):
+    title = "정답지" if answer_key else "학습지"
+    return (
+        "<!DOCTYPE html>\n<html lang='ko'><head><meta charset='utf-8'>"
+        f"<title>두 자리 수 연산 {title}</title><style>"
+        "@page { size: A4; margin: 15mm; }"
+        "body { font-family: sans-serif; }"
+        ".page { page-break-after: always; }"
+        ".page h1 { font-size: 20px; margin: 0 0 4px; }"
+        ".page ol { font-size: 16px; line-height: 2; column-gap: 24px; }"
+        "</style></head><body>\n"
+    ).encode()
+
+
+def write_worksheets(fp, pages, fmt="pdf", answer_key=False, mode="random", count=10, seed=None,
+                     workers=1, chunk_pages=100):
+    """학습지(answer_key면 정답지) pages장을 바이너리 파일 fp에 스트리밍. 사용한 시드 반환
+
+    같은 시드면 같은 퀴즈 코드와 문제가 나오므로 학습지와 정답지를 따로 만들어도 짝이 맞습니다.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"지원하지 않는 형식: {fmt}")
+    if mode not in problem_bank.MODE_OPERATORS:
+        raise ValueError(f"지원하지 않는 연산 모드: {mode}")
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+    chunks = iter_chunks(fmt, pages, answer_key, mode, count, seed, workers, chunk_pages)
+
+    if fmt == "csv":
+        fp.write(b"page,quiz_code,question,problem,answer\n")
+        for data, _ in chunks:
+            fp.write(data)
+    elif fmt == "html":
+        fp.write(_html_header(answer_key))
+        for data, _ in chunks:
+            fp.write(data)
+        fp.write(b"</body></html>\n")
+    else:
+        _write_pdf(fp, pages, chunks)
+    return seed
+
+
+def _write_pdf(fp, pages, chunks):
+    """PDF 머리말, 페이지 묶음, 페이지 트리와 xref 표를 차례로 기록 (객체 위치만 배열로 보관)"""
+    offsets = array('Q')
+    position = 0
+
+    def emit(data):
+        nonlocal position
+        fp.write(data)
+        position += len(data)
+
+    emit(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    # 카탈로그와 글꼴은 먼저, 페이지 목록이 필요한 페이지 트리(2번)는 끝에 기록
+    header_objects = {
+        1: b"1 0 obj\n<< /Type /Catalog /Pages 2 0 R >>\nendobj\n",
+        3: b"3 0 obj\n<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>\nendobj\n",
+    }
+    object_offsets = {}
+    for number, data in header_objects.items():
+        object_offsets[number] = position
+        emit(data)
+    for data, relative in chunks:
+        offsets.extend(position + offset for offset in relative)
+        emit(data)
+
+    object_offsets[2] = position
+    emit(b"2 0 obj\n<< /Type /Pages /Kids [")
+    for first in range(0, pages, 1000):
+        emit(" ".join(f"{PDF_FIRST_PAGE_OBJECT + 2 * i + 1} 0 R"
+                      for i in range(first, min(first + 1000, pages))).encode() + b" ")
+    emit(f"] /Count {pages} >>\nendobj\n".encode())
+
+    xref = position
+    total = PDF_FIRST_PAGE_OBJECT + len(offsets)
+    emit(f"xref\n0 {total}\n0000000000 65535 f \n".encode())
+    emit(b"".join(f"{object_offsets[number]:010d} 00000 n \n".encode() for number in (1, 2, 3)))
+    for start in range(0, len(offsets), 1000):
+        emit(b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets[start:start + 1000]))
+    emit(f"trailer\n<< /Size {total} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+
+
+def main():
+    # 앱의 시작 화면도 이 모듈을 import하므로 명령줄에서만 쓰는 argparse는 여기서 import
+    import argparse
+
+    parser = argparse.ArgumentParser(description="두 자리 수 연산 학습지/정답지 내보내기")
+    parser.add_argument("-o", "--output", required=True, help="출력 파일 (-면 표준 출력)")
+    parser.add_argument("--pages", type=int, default=1, help="페이지 수 (페이지마다 퀴즈 하나)")
+    parser.add_argument("--format", choices=FORMATS, help="출력 형식 (없으면 파일 확장자로 결정)")
+    parser.add_argument("--answers", action="store_true", help="정답지로 출력")
+    parser.add_argument("--mode", choices=sorted(problem_bank.MODE_OPERATORS), default="random")
+    parser.add_argument("--count", type=int, default=20, help="페이지당 문제 수 (최대 100)")
+    parser.add_argument("--seed", type=int, help="같은 시드면 같은 학습지 (학습지/정답지 짝 맞추기용)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="렌더링 프로세스 수")
+    args = parser.parse_args()
+
+    fmt = args.format or os.path.splitext(args.output)[1].lstrip(".").lower()
+    if fmt not in FORMATS:
+        parser.error("--format을 지정하거나 .pdf/.html/.csv 파일 이름을 쓰세요")
+    if not 1 <= args.count <= 100:
+        parser.error("--count는 1~100이어야 합니다")
+    if args.pages < 1:
+        parser.error("--pages는 1 이상이어야 합니다")
+
+    if args.output == "-":
+        seed = write_worksheets(sys.stdout.buffer, args.pages, fmt, args.answers, args.mode, args.count,
+                                args.seed, args.workers)
+    else:
+        with open(args.output, "wb") as f:
+            seed = write_worksheets(f, args.pages, fmt, args.answers, args.mode, args.count,
+                                    args.seed, args.workers)
+    print(f"{args.pages}페이지 → {args.output} (시드 {seed})", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()